@@ -1,37 +1,65 @@
 """download documents from web portals"""
 
+import functools
+import http.client
 import json
+import logging
 import re
 import shutil
+import socket
 import sys
+import tempfile
 import time
 import os
-import platform
 import requests
+import urllib3.exceptions
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 import jq
-import watchdog.events
-import watchdog.observers
 
+import docdl.browserd
+from docdl.errors import (
+    AuthenticationError,
+    DownloadError,
+    IncompleteDownloadError,
+)
 import docdl.util
-
-
-# ---------------------------------------------------------------------
-class AuthenticationError(Exception):
-    """authentication failure"""
-
-
-class DownloadError(Exception):
-    """download failure"""
+import docdl.util.conditions
+import docdl.util.cookies
+import docdl.util.devtools
+import docdl.util.downloadwatch
+import docdl.util.httpcache
+import docdl.util.links
+import docdl.util.partial
+import docdl.util.ratelimit
+import docdl.util.scroll
+import docdl.util.store
+import docdl.util.table
+import docdl.util.writer
+import docdl.webdriver
 
 
 # ---------------------------------------------------------------------
 class WebPortal:
     """base class for service portal to download documents from"""
 
+    # pylint: disable=R0902
+
     # default timeout (seconds)
     TIMEOUT = 15
+    # requests per second per host (None for unlimited)
+    RATE_LIMIT = None
+    # requests per host that may be sent at once before RATE_LIMIT applies
+    RATE_BURST = 1
+    # connections kept alive per host
+    POOL_SIZE = 10
+    # retries of GET/HEAD requests on connection errors, 429 and 5xx
+    RETRIES = 3
+    # exponential backoff factor between retries (seconds)
+    BACKOFF = 0.5
+    # maximum size of chunks read while downloading (bytes)
+    BUFFER_SIZE = 4 * 1024 * 1024
+    # print download throughput to stderr
+    STATISTICS = False
 
     def __init__(self, login_id, password, useragent=None, arguments=None):
         """
@@ -45,14 +73,57 @@ class WebPortal:
         if arguments is None:
             arguments = {}
         self.arguments = arguments
+        # command line settings override the ones of the plugin class
+        for name, value in arguments.get("settings", {}).items():
+            if value is not None:
+                setattr(self, name.upper(), value)
+        # keep a connection per concurrent download
+        # pylint: disable=C0103
+        self.POOL_SIZE = max(self.POOL_SIZE, arguments.get("jobs", 1))
         self.login_id = login_id
         self.password = password
         self.useragent = useragent
+        # name of plugin for path templates
+        self.plugin_name = arguments.get("plugin", self.__class__.__name__.lower())
+        # directory to download to
+        self.output_dir = os.path.abspath(arguments.get("output_dir") or os.getcwd())
+        os.makedirs(self.output_dir, exist_ok=True)
+        # path of downloaded files relative to output_dir
+        self.path_template = arguments.get("path_template") or "{filename}"
         # initialize requests HTTP session
         self.session = requests.Session()
+        adapter = docdl.util.ratelimit.RateLimitedAdapter(
+            rate=self.RATE_LIMIT,
+            burst=self.RATE_BURST,
+            pool_connections=self.POOL_SIZE,
+            pool_maxsize=self.POOL_SIZE,
+            max_retries=docdl.util.ratelimit.RateLimitedRetry(
+                rate=self.RATE_LIMIT,
+                burst=self.RATE_BURST,
+                total=self.RETRIES,
+                backoff_factor=self.BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET", "HEAD"),
+                respect_retry_after_header=True,
+                # return last response instead of raising
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         # set user agent
         if useragent:
             self.session.headers["User-Agent"] = useragent
+        # remember validators of downloaded urls for conditional GETs
+        self.validators = None
+        if arguments.get("http_cache"):
+            self.validators = docdl.util.httpcache.ValidatorCache(self.output_dir)
+        # deduplicate downloaded files
+        self.store = None
+        if arguments.get("store"):
+            self.store = docdl.util.store.ContentStore(arguments["store"])
+        # documents downloaded by previous runs (docdl.util.state.State)
+        self.state = arguments.get("state")
 
     def __enter__(self):
         # login to service
@@ -64,6 +135,10 @@ class WebPortal:
         # logout
         self.logout()
 
+    def is_logged_in(self):
+        """:result: True if the session of a previous run is still valid"""
+        return False
+
     def login(self):
         """authenticate to service"""
         raise NotImplementedError(f"{ self.__class__} needs a login() method")
@@ -84,25 +159,148 @@ class WebPortal:
         if not document.url:
             return None
         filename = self.download_with_requests(document)
-        return document.rename_after_download(filename)
+        return self.rename_after_download(document, filename)
+
+    def can_download_in_background(self, document):
+        """true if document can be downloaded by just GETting its url"""
+        # plugins with a custom download() need to download themselves
+        if type(self).download not in (WebPortal.download, SeleniumWebPortal.download):
+            return False
+        # documents without url need the browser
+        return bool(document.url) and not document.download_element
+
+    def download_in_background(self, executor, document):
+        """
+        submit download of document to executor
+
+        :param executor: concurrent.futures.Executor to submit to
+        :param document: docdl.Document to download
+        :result: concurrent.futures.Future or None if the document
+                 needs to be downloaded in the foreground
+        """
+        if not self.can_download_in_background(document):
+            return None
+        self.prepare_requests_session()
+
+        def _download():
+            filename = self.download_with_requests(document)
+            return self.rename_after_download(document, filename)
+
+        return executor.submit(_download)
+
+    def target_path(self, document, filename):
+        """
+        :param document: downloaded docdl.Document
+        :param filename: filename of document
+        :result: absolute path of document according to path template
+        """
+        path = os.path.join(
+            self.output_dir,
+            docdl.util.format_path(
+                self.path_template,
+                **{**document.attributes, "plugin": self.plugin_name, "filename": filename},
+            ),
+        )
+        # don't let attributes escape the output directory
+        if os.path.commonpath([path, self.output_dir]) != self.output_dir:
+            raise DownloadError(f'"{path}" is outside of "{self.output_dir}"')
+        return path
+
+    def rename_after_download(self, document, filename):
+        """
+        move downloaded file to its path in the output directory
+
+        :param document: downloaded docdl.Document
+        :param filename: path of downloaded file (relative to output_dir)
+        """
+        return document.rename_after_download(
+            os.path.join(self.output_dir, filename),
+            store=self.store,
+            target=functools.partial(self.target_path, document),
+        )
+
+    def prepare_requests_session(self):
+        """
+        called before self.session is handed to downloads running in
+        the background
+        """
 
     def download_with_requests(self, document):
-        """download a file without the browser using requests"""
+        """
+        download a file without the browser using requests, resume
+        truncated downloads
+
+        :result: path of downloaded file
+        """
+        path = None
+        for attempt in range(self.RETRIES + 1):
+            try:
+                return self._download_with_requests(document, path)
+            except IncompleteDownloadError as exc:
+                if attempt == self.RETRIES:
+                    raise
+                # continue where the transfer stopped
+                path = exc.path
+                time.sleep(self.BACKOFF * 2**attempt)
+        # not reached
+        return None
+
+    def _download_with_requests(self, document, path=None):
+        """
+        :param document: docdl.Document to download
+        :param path: path of a partial download to resume (if known)
+        :result: path of downloaded file
+        """
+        headers = {**document.request_headers}
+        # continue partial download of previous run if filename is known
+        if path is None and "filename" in document.attributes:
+            path = self.target_path(document, self._filename(document, {}))
+        if path:
+            headers.update(docdl.util.partial.resume_headers(path))
+        # only fetch document if it changed since last download
+        if self.validators and "Range" not in headers:
+            headers.update(self.validators.headers(document.url))
         # fetch url
-        req = self.session.get(
-            document.url, stream=True, headers=document.request_headers
-        )
+        req = self.session.get(document.url, stream=True, headers=headers)
+        # document didn't change, reuse local file
+        if req.status_code == 304:
+            if not (filename := self.validators.filename(document.url)):
+                raise DownloadError(f'"{document.url}" not modified but file is gone')
+            document.digest = self.validators.digest(document.url)
+            return filename
+        # partial download can't be resumed?
+        if req.status_code == 416 and "Range" in headers:
+            # start over
+            docdl.util.partial.remove(path)
+            return self._download_with_requests(document)
         if not req.ok:
             raise DownloadError(f'"{document.url}" status code: {req.status_code}')
+        # resolved link of a download element led to a web page?
+        if document.download_element and req.headers.get(
+            "content-type", ""
+        ).startswith("text/html"):
+            raise DownloadError(f'"{document.url}" is a web page')
+
+        # save file
+        path = self.target_path(document, self._filename(document, req.headers))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        document.digest = self._save_response(req, path)
+        if self.validators:
+            self.validators.update(document.url, req.headers, path, document.digest)
+
+        return path
 
+    @staticmethod
+    def _filename(document, headers):
+        """find filename for document from its attributes or response headers"""
         # filename not already set?
         if "filename" in document.attributes:
             filename = document.attributes["filename"]
         # get filename from header
-        elif "content-disposition" in req.headers:
+        elif "content-disposition" in headers:
             # @todo properly parse rfc6266
             filename = re.findall(
-                "filename=([^; ]+)[;]?.*", req.headers["content-disposition"]
+                "filename=([^; ]+)[;]?.*", headers["content-disposition"]
             )[0]
         else:
             filename = None
@@ -117,19 +315,80 @@ class WebPortal:
                 raise RuntimeError("no suitable filename")
 
         # massage filename
-        filename = filename.replace('"', "").strip()
-        # save file
-        with open(os.path.join(os.getcwd(), filename), "wb") as doc:
-            for chunk in req.iter_content(chunk_size=4096):
-                doc.write(chunk)
+        return filename.replace('"', "").strip()
 
-        return filename
+    def _save_response(self, req, path):
+        """
+        stream response body to path.part and move it to path when
+        the download is complete
+
+        :result: sha256 hexdigest of file
+        """
+        mode, digest = docdl.util.partial.begin(
+            req.url, req.status_code, req.headers, path
+        )
+        # save file
+        writer = docdl.util.writer.StreamWriter(self.BUFFER_SIZE)
+        # let urllib3 decompress gzip/deflate encoded bodies
+        req.raw.decode_content = True
+        try:
+            with open(f"{path}.part", mode) as doc:
+                writer.copy(req.raw, doc, digest)
+        # connection dropped or body shorter than content-length
+        except (
+            http.client.IncompleteRead,
+            ConnectionError,
+            TimeoutError,
+            socket.timeout,
+            urllib3.exceptions.ProtocolError,
+            urllib3.exceptions.ReadTimeoutError,
+        ) as exc:
+            raise IncompleteDownloadError(f'"{req.url}" truncated: {exc}', path) from exc
+        self._statistics(path, writer.bytes, writer.seconds)
+        # raw bytes received (before decompression)
+        docdl.util.partial.end(req.url, req.headers, path, req.raw.tell())
+        return digest.hexdigest()
+
+    def _statistics(self, path, received, seconds):
+        """report download throughput"""
+        if not self.STATISTICS:
+            return
+        print(
+            json.dumps(
+                {
+                    "filename": os.path.basename(path),
+                    "bytes": received,
+                    "seconds": round(seconds, 3),
+                    "bytes_per_second": round(received / seconds) if seconds else 0,
+                }
+            ),
+            file=sys.stderr,
+        )
 
 
 class SeleniumWebPortal(WebPortal):
     """access portal using selenium"""
 
+    # pylint: disable=R0902
+
     WEBDRIVER = "chrome"
+    # GET urls of download_elements that are plain links instead of
+    # clicking them
+    RESOLVE_LINKS = True
+    # resource types (docdl.util.devtools.RESOURCE_TYPES) not to load
+    BLOCK_RESOURCES = ["font", "media"]
+    # urls not to load (* wildcards)
+    BLOCK_URLS = [
+        "*google-analytics.com/*",
+        "*googletagmanager.com/*",
+        "*doubleclick.net/*",
+        "*connect.facebook.net/*",
+        "*hotjar.com/*",
+    ]
+    # urls of blocked resource types to load anyway (e.g. needed to login)
+    ALLOW_URLS = []
+    # browser downloads may take that many TIMEOUTs at all
+    DOWNLOAD_TIMEOUTS = 20
 
     def __init__(self, login_id, password, useragent=None, arguments=None):
         """
@@ -142,181 +401,147 @@ class SeleniumWebPortal(WebPortal):
         :param arguments: extra arguments
         """
         super().__init__(login_id, password, useragent, arguments)
-
-        # initialize selenium
-        webdriver_opts = self._init_webdriver_options()
-        self._init_webdriver(webdriver_opts, arguments["webdriver"])
+        # keep browser profile of this plugin and account between runs?
+        self.profile_dir = None
+        if self.arguments.get("profile_dir"):
+            self.profile_dir = os.path.abspath(
+                os.path.join(
+                    self.arguments["profile_dir"],
+                    docdl.util.format_path(
+                        "{plugin}/{account}", plugin=self.plugin_name, account=login_id
+                    ),
+                )
+            )
+            os.makedirs(self.profile_dir, exist_ok=True)
+        # observer for files downloaded by the browser
+        self.download_watcher = docdl.util.downloadwatch.DownloadWatcher()
+        # download events of chromium based browsers (False if unavailable)
+        self.devtools = None
+        # resolved links lead to files (None until the first one was tried)
+        self.links_resolvable = None
+
+        # attach to warm browser of document-dl-browserd?
+        self.browser_lease = None
+        if (
+            arguments.get("browser_daemon")
+            and self.WEBDRIVER == "chrome"
+            and not self.profile_dir
+        ):
+            self.browser_lease = docdl.browserd.Lease.acquire(arguments["browser_daemon"])
+
+        # requests the browser shouldn't send
+        options = arguments["webdriver"]
+        self.block_resources = [
+            resource
+            for resource in options.get("block_resources") or self.BLOCK_RESOURCES
+            if resource != "none"
+        ]
+        self.block_urls = self.BLOCK_URLS + list(options.get("block_urls", []))
+        # chromium pauses every request to block resource types (opt-in)
+        self.intercept_requests = bool(options.get("block_requests"))
+        self.request_blocker = None
+
+        # browser downloads go to a directory of their own, so files that
+        # requests downloads save meanwhile can't be mistaken for them
+        self.download_dir = docdl.util.downloadwatch.create_download_dir(self.output_dir)
+        try:
+            # initialize selenium
+            webdriver_opts = self._init_webdriver_options()
+            self._init_webdriver(webdriver_opts, options)
+        # __exit__() won't clean up
+        except BaseException:
+            shutil.rmtree(self.download_dir, ignore_errors=True)
+            if self.browser_lease:
+                self.browser_lease.release()
+            raise
+        # copies cookies between browser and self.session
+        self.cookies = docdl.util.cookies.CookieBridge(self.webdriver, self.session)
+        self._block_requests()
 
     def __enter__(self):
-        super().__enter__()
-        # copy cookies to requests session
-        self.copy_to_requests_session()
+        try:
+            # login unless the session in the profile is still valid
+            if not (self.keeps_session() and self.is_logged_in()):
+                super().__enter__()
+            # copy cookies to requests session
+            self.copy_to_requests_session()
+        # __exit__() isn't called if entering fails
+        except BaseException:
+            self.release_webdriver()
+            raise
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """cleanup selenium"""
-        super().__exit__(exc_type, exc_val, exc_tb)
-        self.webdriver.close()
+        # keep session of persistent profile for the next run
+        if not self.keeps_session():
+            super().__exit__(exc_type, exc_val, exc_tb)
+        self.release_webdriver()
+
+    def keeps_session(self):
+        """
+        :result: True if the session is kept in a persistent profile
+                 (only plugins that can tell whether it's still valid)
+        """
+        return bool(self.profile_dir) and (
+            type(self).is_logged_in is not WebPortal.is_logged_in
+        )
+
+    def release_webdriver(self):
+        """
+        close the browser when the plugin doesn't need it anymore (e.g.
+        when the remaining documents are fetched with self.session).
+        Cookies of the browser are kept in self.session, self.webdriver
+        is None afterwards.
+        """
+        if not self.webdriver:
+            return
+        self.copy_to_requests_session()
+        self.download_watcher.stop()
+        if self.devtools:
+            self.devtools.stop()
+            shutil.rmtree(self.devtools.directory, ignore_errors=True)
+        if self.request_blocker:
+            self.request_blocker.stop()
+        # leased browsers keep running
+        if not self.browser_lease:
+            self.webdriver.close()
         self.webdriver.quit()
+        self.webdriver = None
+        # let the daemon discard the session once chromedriver let go
+        if self.browser_lease:
+            self.browser_lease.release()
+        shutil.rmtree(self.download_dir, ignore_errors=True)
 
     def _init_webdriver_options(self):
         """init selenium options"""
-        # choose webdriver options
-        if self.WEBDRIVER == "chrome":
-            # pylint: disable=C0415
-            from selenium.webdriver.chrome.options import Options
-
-        elif self.WEBDRIVER == "edge":
-            # pylint: disable=C0415
-            from selenium.webdriver.edge.options import Options
-
-        elif self.WEBDRIVER == "firefox":
-            # pylint: disable=C0415
-            from selenium.webdriver.firefox.options import Options
-
-        elif self.WEBDRIVER == "ie":
-            # pylint: disable=C0415
-            from selenium.webdriver.ie.options import Options
-
-        elif self.WEBDRIVER == "safari":
-            # pylint: disable=C0415,E0611,E0401
-            from selenium.webdriver.safari.options import Options
-
-        elif self.WEBDRIVER == "webkitgtk":
-            # pylint: disable=C0415
-            from selenium.webdriver.webkitgtk.options import Options
-
-        else:
-            raise AttributeError('unknown webdriver: "{self.WEBDRIVER}"')
-        return Options()
+        return docdl.webdriver.create_options(self.WEBDRIVER)
 
     def _init_webdriver(self, webdriver_options, options):
         """init selenium"""
-        # pylint: disable=C0415
-        from selenium import webdriver
-
-        def _init_chrome():
-            # add prefs
-            # selenium webdriver specific options
-            if "headless" in options:
-                # set headless mode
-                webdriver_options.headless = options["headless"]
-            if "load_images" in options and options["load_images"]:
-                # disable image loading
-                webdriver_options.add_experimental_option(
-                    "prefs",
-                    {
-                        "profile.default_content_settings.images": 2,
-                        "profile.managed_default_content_settings.images": 2,
-                    },
+        self.webdriver = docdl.webdriver.start(self, webdriver_options, options)
+
+    def _block_requests(self):
+        """let chromium based browsers fail blocked requests"""
+        # other browsers only block resource types by preferences
+        if not hasattr(self.webdriver, "execute_cdp_cmd"):
+            return
+        try:
+            # urls are blocked without pausing requests
+            if self.block_urls:
+                self.webdriver.execute_cdp_cmd("Network.enable", {})
+                self.webdriver.execute_cdp_cmd(
+                    "Network.setBlockedURLs", {"urls": self.block_urls}
                 )
-            # enable incognito mode
-            webdriver_options.add_argument("--incognito")
-            # set preferences
-            webdriver_options.add_experimental_option(
-                "prefs",
-                {
-                    # always save PDFs
-                    "plugins.always_open_pdf_externally": True,
-                    # set default download directory to CWD
-                    "download.default_directory": os.getcwd(),
-                },
-            )
-            # set user agent
-            if self.useragent:
-                webdriver_options.add_argument(f"user-agent='{self.useragent}'")
-            # enable debugging
-            if "debug" in options:
-                webdriver_options.add_argument("--remote-debugging-port=9222")
-            # set preference options & init webdriver
-            return webdriver.Chrome(options=webdriver_options)
-
-        def _init_edge():
-            # pylint: disable=E1123
-            return webdriver.Edge(options=webdriver_options)
-
-        def _init_firefox():
-            # pylint: disable=C0415
-            from selenium.webdriver.firefox.firefox_binary import FirefoxBinary
-
-            # create custom profile
-            firefox_profile = webdriver.FirefoxProfile()
-            # webdriver.get_cookies() won't work in private browsing mode :(
-            # ~ # always enable private browsing
-            # ~ firefox_profile.set_preference(
-            # ~     "browser.privatebrowsing.autostart", True
-            # ~ )
-            # set default download directory to CWD
-            firefox_profile.set_preference("browser.download.folderList", 2)
-            firefox_profile.set_preference(
-                "browser.download.manager.showWhenStarting", False
-            )
-            firefox_profile.set_preference("browser.download.dir", os.getcwd())
-            # save PDFs by default (don't preview)
-            firefox_profile.set_preference(
-                "browser.helperApps.neverAsk.saveToDisk", "application/pdf"
-            )
-            firefox_profile.set_preference("pdfjs.disabled", True)
-            firefox_profile.set_preference("plugin.scan.Acrobat", "999.0")
-            firefox_profile.set_preference("plugin.scan.plid.all", False)
-            # turn off image loading by default
-            firefox_profile.set_preference("permissions.default.image", 2)
-            # headless mode
-            if "headless" in options:
-                # set headless mode
-                webdriver_options.headless = options["headless"]
-            # set user agent
-            if self.useragent:
-                firefox_profile.set_preference(
-                    "general.useragent.override", self.useragent
+            if self.block_resources and self.intercept_requests:
+                blocker = docdl.util.devtools.RequestBlocker(
+                    self.webdriver, self.block_resources, allow=self.ALLOW_URLS
                 )
-            # find binary
-            if platform.machine() in ["x86_64", "s390x", "sparc64"]:
-                moz_lib_dir = "/usr/lib64"
-                secondary_lib_dir = "/usr/lib"
-            else:
-                moz_lib_dir = "/usr/lib"
-                secondary_lib_dir = "/usr/lib64"
-            # try firefox binary
-            ff_path = f"{moz_lib_dir}/firefox/firefox"
-            if not (os.path.isfile(ff_path) and os.access(ff_path, os.X_OK)):
-                ff_path = f"{secondary_lib_dir}/firefox/firefox"
-                if not (os.path.isfile(ff_path) and os.access(ff_path, os.X_OK)):
-                    raise RuntimeError(
-                        f"firefox binary not found in {moz_lib_dir} "
-                        "or {secondary_lib_dir}"
-                    )
-            # get path to geckodriver executable
-            gecko_path = shutil.which("geckodriver")
-            # set firefox profile
-            webdriver_options.profile = firefox_profile
-            # set firefox binary
-            webdriver_options.binary = FirefoxBinary(os.path.join(gecko_path, ff_path))
-            # initialize driver
-            return webdriver.Firefox(options=webdriver_options)
-
-        def _init_ie():
-            return webdriver.Ie(options=webdriver_options)
-
-        def _init_safari():
-            # pylint: disable=E1123
-            return webdriver.Safari(options=webdriver_options)
-
-        def _init_webkitgtk():
-            return webdriver.WebKitGTK(options=webdriver_options)
-
-        # webdriver registry
-        webdrivers = {
-            "chrome": _init_chrome,
-            "edge": _init_edge,
-            "firefox": _init_firefox,
-            "ie": _init_ie,
-            "safari": _init_safari,
-            "webkitgtk": _init_webkitgtk,
-        }
-
-        # init webdriver
-        self.webdriver = webdrivers[self.WEBDRIVER]()
+                blocker.start(self.TIMEOUT)
+                self.request_blocker = blocker
+        # load everything
+        except Exception as exc:  # pylint: disable=W0703
+            logging.warning("%s: can't block requests: %s", self.plugin_name, exc)
 
     def documents(self):
         """
@@ -328,70 +553,163 @@ class SeleniumWebPortal(WebPortal):
         """download a document"""
         # click download element to trigger download ?
         if document.download_element:
-            filename = self.download_with_selenium(document)
+            return self.download_with_selenium(document)
         # GET url?
-        elif document.url:
+        if document.url:
             # copy cookies from selenium to requests session
             self.copy_to_requests_session()
             filename = self.download_with_requests(document)
             self.copy_from_requests_session()
+            return self.rename_after_download(document, filename)
         # don't attempt download
-        else:
-            return None
-        return document.rename_after_download(filename)
+        return None
+
+    def can_download_in_background(self, document):
+        if document.download_element:
+            if type(self).download is not SeleniumWebPortal.download:
+                return False
+            # clicks must happen here but the browser can download in
+            # the background if every download gets its own directory
+            if hasattr(self.webdriver, "execute_cdp_cmd"):
+                return True
+            # links known to lead to files can always be fetched
+            return bool(self.links_resolvable and self.resolve_download_element(document))
+        return super().can_download_in_background(document)
+
+    def download_in_background(self, executor, document):
+        if not document.download_element or not self.can_download_in_background(
+            document
+        ):
+            return super().download_in_background(executor, document)
+        # click now, wait for the file in the background
+        handler = self.start_download(document)
+        return executor.submit(self.finish_download, document, handler)
+
+    def prepare_requests_session(self):
+        """copy browser session before handing it to downloads"""
+        self.copy_to_requests_session()
 
     def download_with_selenium(self, document):
         """download a file using the selenium webdriver"""
+        return self.finish_download(document, self.start_download(document))
 
-        class DownloadFileCreatedHandler(watchdog.events.PatternMatchingEventHandler):
-            """
-            directory watchdog to store filename of newly created file
-            """
-
-            filename = None
-
-            def on_created(self, event):
-                self.filename = os.path.basename(event.src_path)
+    def resolve_download_element(self, document):
+        """:result: url the download element links to or None"""
+        if not self.RESOLVE_LINKS or self.links_resolvable is False:
+            return None
+        # resolve every element only once
+        element = document.download_element
+        if not document.link or document.link[0] is not element:
+            url = docdl.util.links.resolve(element, self.webdriver.current_url)
+            document.link = (element, url)
+        return document.link[1]
+
+    def start_download(self, document):
+        """
+        fetch the link or click the download element of document
 
+        :result: docdl.util.links.LinkDownload,
+                 docdl.util.devtools.ChromeDownload or
+                 docdl.util.downloadwatch.DownloadFileHandler of download
+        """
+        # GET link instead of clicking it?
+        if url := self.resolve_download_element(document):
+            self.prepare_requests_session()
+            handler = docdl.util.links.LinkDownload(self, document, url)
+            if self.links_resolvable:
+                return handler
+            # try first link right away, click if it doesn't lead to a file
+            try:
+                handler.download()
+                self.links_resolvable = True
+                return handler
+            except (DownloadError, requests.RequestException):
+                self.links_resolvable = False
         # scroll to download element
         self.scroll_to_element(document.download_element)
-
-        # setup download directory watchdog
-        # pylint: disable=C0103
-        OBSERVER = watchdog.observers.Observer()
-        # ignore temporary download files
-        handler = DownloadFileCreatedHandler(
-            ignore_patterns=["*.crdownload", "*.part", ".com.google.Chrome.*"]
-        )
-        OBSERVER.schedule(handler, os.getcwd(), recursive=False)
-
+        # let chromium announce the download
+        if devtools := self._devtools_downloads():
+            handler = devtools.expect()
+            pipelined = True
+        else:
+            # other browsers download one file at a time
+            directory = self.download_dir
+            # let chrome download to a staging directory per click,
+            # so downloads of different clicks can't be mixed up
+            pipelined = hasattr(self.webdriver, "execute_cdp_cmd")
+            if pipelined:
+                directory = tempfile.mkdtemp(prefix=".document-dl-", dir=self.download_dir)
+                self.webdriver.execute_cdp_cmd(
+                    "Page.setDownloadBehavior",
+                    {"behavior": "allow", "downloadPath": directory},
+                )
+            # setup download directory watchdog before the download starts
+            handler = self.download_watcher.expect(directory, staging=pipelined)
         # click element to start download
         document.download_element.click()
-
-        # wait for download completed
-        OBSERVER.start()
+        # don't start another download before this one began (a late
+        # download would be taken for the one of the next click)
+        if pipelined and not handler.started.wait(self.TIMEOUT):
+            handler.close()
+            raise DownloadError(f"{document}: download didn't start")
+        return handler
+
+    def finish_download(self, document, handler):
+        """
+        wait for download started by start_download() and move file
+        to its path in the output directory
+        """
         try:
-            while not handler.filename:
-                time.sleep(0.1)
+            # wait for download completed
+            path = handler.wait(self.TIMEOUT, self.TIMEOUT * self.DOWNLOAD_TIMEOUTS)
+            if not path:
+                raise DownloadError(f"{document}: download was canceled")
+            # chromium saves files under a generated name
+            if handler.filename and "filename" not in document.attributes:
+                document.attributes["filename"] = handler.filename
+            filename = self.rename_after_download(document, path)
+            if handler.seconds is not None:
+                self._statistics(
+                    document.attributes["path"],
+                    document.attributes["size"],
+                    handler.seconds,
+                )
+            return filename
+        except TimeoutError as exc:
+            raise DownloadError(f"{document}: {exc}") from exc
         finally:
-            OBSERVER.stop()
-        OBSERVER.join()
+            handler.close()
 
-        return handler.filename
+    def _devtools_downloads(self):
+        """
+        :result: docdl.util.devtools.ChromeDownloads or None if the
+                 browser can't send download events
+        """
+        if self.devtools is None:
+            self.devtools = False
+            if hasattr(self.webdriver, "execute_cdp_cmd"):
+                devtools = docdl.util.devtools.ChromeDownloads(
+                    self.webdriver,
+                    tempfile.mkdtemp(prefix=".document-dl-", dir=self.download_dir),
+                )
+                try:
+                    devtools.start(self.TIMEOUT)
+                    self.devtools = devtools
+                # fall back to watching the filesystem
+                except Exception:  # pylint: disable=W0703
+                    shutil.rmtree(devtools.directory, ignore_errors=True)
+        return self.devtools or None
 
     def copy_to_requests_session(self):
         """copy current selenium session to requests session"""
-        # copy cookies
-        for cookie in self.webdriver.get_cookies():
-            self.session.cookies.set(cookie["name"], cookie["value"])
-        # copy user agent
-        user_agent = self.webdriver.execute_script("return navigator.userAgent;")
-        self.session.headers["User-Agent"] = user_agent
+        # self.session is all that's left after release_webdriver()
+        if self.webdriver:
+            self.cookies.to_session()
 
     def copy_from_requests_session(self):
         """copy current requests session to selenium session"""
-        for name, value in self.session.cookies.items():
-            self.webdriver.add_cookie({"name": name, "value": value})
+        if self.webdriver:
+            self.cookies.from_session()
 
     def captcha(self, image, entry, prompt="please enter captcha: "):
         """handle captcha"""
@@ -419,9 +737,40 @@ class SeleniumWebPortal(WebPortal):
         """scroll to bottom of page"""
         self.webdriver.execute_script("window.scrollTo(0, document.body.scrollHeight)")
 
+    def load_all(self, items, loading=None, steps=None):
+        """
+        load all items of an infinite-scroll list inside the browser
+        (see docdl.util.scroll.load_all)
+
+        :result: number of items
+        """
+        return docdl.util.scroll.load_all(self.webdriver, items, loading, steps)
+
+    def extract_table(self, rows, columns, root=None):
+        """
+        read columns of all rows at once (see docdl.util.table.extract)
+
+        :result: list of dicts
+        """
+        return docdl.util.table.extract(self.webdriver, rows, columns, root)
+
+    def wait_until(self, condition, timeout=None):
+        """
+        wait for a condition of docdl.util.conditions inside the browser
+        (callables like selenium's expected_conditions are polled)
+
+        :param condition: condition to wait for
+        :param timeout: seconds to wait (default: TIMEOUT)
+        :result: result of condition
+        """
+        timeout = timeout or self.TIMEOUT
+        if callable(condition):
+            return WebDriverWait(self.webdriver, timeout).until(condition)
+        return docdl.util.conditions.wait(self.webdriver, condition, timeout)
+
     def wait_for_urlchange(self, current_url):
         """wait until current URL changes"""
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(EC.url_changes(current_url))
+        self.wait_until(docdl.util.conditions.url_changes(current_url))
         # return new url
         return self.webdriver.current_url
 
@@ -429,6 +778,17 @@ class SeleniumWebPortal(WebPortal):
 class Document:
     """a document"""
 
+    # attributes that may change between runs for the same document
+    VOLATILE_ATTRIBUTES = (
+        "id",
+        "filename",
+        "path",
+        "sha256",
+        "size",
+        "status",
+        "unread",
+    )
+
     def __init__(
         self, url=None, attributes=None, request_headers=None, download_element=None
     ):
@@ -440,27 +800,66 @@ class Document:
         self.url = url
         # if download_element is set, it will be click()ed for download
         self.download_element = download_element
+        # (download_element, url it links to or None) once it was resolved
+        self.link = None
         # portal specific attributes
         if attributes is None:
             attributes = {}
         self.attributes = attributes
+        # sha256 hexdigest of downloaded file (if it was hashed while saving)
+        self.digest = None
 
     def __repr__(self):
         return f'class {self.__class__.__name__}(url="{self.url}", attributes={self.attributes})'
 
-    def rename_after_download(self, filename):
+    def key(self):
+        """:result: string that identifies this document across runs"""
+        return json.dumps(
+            {
+                "url": self.url,
+                **{
+                    name: value
+                    for name, value in self.attributes.items()
+                    if name not in self.VOLATILE_ATTRIBUTES
+                },
+            },
+            sort_keys=True,
+            cls=docdl.util.dateparser.DateEncoder,
+        )
+
+    def rename_after_download(self, filename, store=None, target=None):
         """
         called after file was downloaded - checks if there's a filename
         the newly downloaded file should be renamed to. Rename file if
         so.
+
+        :param filename: path of downloaded file
+        :param store: docdl.util.store.ContentStore to hardlink file to
+        :param target: function that returns the final path for a
+                       filename (default: keep file in its directory)
         """
-        # got a predefined filename?
-        if "filename" in self.attributes:
-            # rename file to predefined name
-            os.rename(filename, self.attributes["filename"])
-        else:
+        # no predefined filename?
+        if "filename" not in self.attributes:
             # save new filename
-            self.attributes["filename"] = filename
+            self.attributes["filename"] = os.path.basename(filename)
+        # find final path
+        if target:
+            path = target(self.attributes["filename"])
+        else:
+            path = os.path.join(os.path.dirname(filename), self.attributes["filename"])
+        # rename file
+        if os.path.abspath(filename) != os.path.abspath(path):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            os.rename(filename, path)
+        self.attributes["path"] = path
+        # browser downloads weren't hashed while saving
+        if self.digest is None:
+            self.digest = docdl.util.store.ContentStore.digest(path)
+        self.attributes["sha256"] = self.digest
+        self.attributes["size"] = os.path.getsize(path)
+        # deduplicate file
+        if store:
+            store.add(path, self.digest)
         return filename
 
     def match_string(self, filters):
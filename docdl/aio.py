@@ -0,0 +1,222 @@
+"""asyncio based download engine (needs aiohttp)"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+import requests
+
+import docdl
+import docdl.pool
+import docdl.util.partial
+import docdl.util.ratelimit
+
+
+# we share the download helpers of WebPortal pylint: disable=W0212
+class AsyncDownloadPool(docdl.pool.DownloadPool):
+    """
+    download documents using a single asyncio event loop running in a
+    background thread instead of a pool of worker threads, so hundreds
+    of downloads can be in flight at once
+    """
+
+    def __init__(self, portal, jobs=1):
+        """
+        :param portal: WebPortal instance to download from
+        :param jobs: maximum amount of concurrent downloads
+        """
+        super().__init__(portal, jobs)
+        try:
+            # pylint: disable=C0415
+            import aiohttp
+        except ImportError as exc:
+            raise RuntimeError("async download engine needs aiohttp") from exc
+        self.aiohttp = aiohttp
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.client = None
+        self.semaphore = None
+
+    def __enter__(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._open(), self.loop).result()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        futures = [future for _, future in self.pending if future]
+        # don't wait for pending downloads if something went wrong
+        if exc_type is not None:
+            for future in futures:
+                future.cancel()
+        concurrent.futures.wait(futures)
+        asyncio.run_coroutine_threadsafe(self.client.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def _open(self):
+        """create client session inside the event loop"""
+        self.semaphore = asyncio.Semaphore(self.jobs)
+        self.client = self.aiohttp.ClientSession(
+            connector=self.aiohttp.TCPConnector(
+                limit=self.jobs, limit_per_host=self.portal.POOL_SIZE
+            ),
+            timeout=self.aiohttp.ClientTimeout(
+                sock_connect=self.portal.TIMEOUT, sock_read=self.portal.TIMEOUT
+            ),
+            # cookies are taken from the requests session of the portal
+            cookie_jar=self.aiohttp.DummyCookieJar(),
+        )
+
+    def _submit(self, document):
+        if not self.portal.can_download_in_background(document):
+            return None
+        # browser downloads are collected by a thread of the event loop
+        if document.download_element:
+            handler = self.portal.start_download(document)
+            return asyncio.run_coroutine_threadsafe(
+                self._finish_download(document, handler), self.loop
+            )
+        # take over cookies and headers of the portal session
+        self.portal.prepare_requests_session()
+        return asyncio.run_coroutine_threadsafe(self._download(document), self.loop)
+
+    async def _finish_download(self, document, handler):
+        """wait for a download of the browser without blocking the loop"""
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.portal.finish_download, document, handler
+        )
+
+    async def _download(self, document):
+        """download document and rename it"""
+        async with self.semaphore:
+            filename = await self.download_with_aiohttp(document)
+        return self.portal.rename_after_download(document, filename)
+
+    async def _get(self, url, headers):
+        """
+        GET url with the cookies and headers of the requests session,
+        retry like the requests session does
+
+        :result: aiohttp.ClientResponse
+        """
+        portal = self.portal
+        # let requests add session cookies, user agent, ...
+        prepared = portal.session.prepare_request(
+            requests.Request("GET", url, headers=headers)
+        )
+        for attempt in range(portal.RETRIES + 1):
+            last_attempt = attempt == portal.RETRIES
+            if portal.RATE_LIMIT:
+                await docdl.util.ratelimit.bucket(
+                    prepared.url, portal.RATE_LIMIT, portal.RATE_BURST
+                ).acquire_async()
+            try:
+                resp = await self.client.get(
+                    prepared.url, headers=dict(prepared.headers)
+                )
+            except (self.aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+                await asyncio.sleep(portal.BACKOFF * 2**attempt)
+                continue
+            if last_attempt or resp.status not in (429, 500, 502, 503, 504):
+                return resp
+            # honour Retry-After (seconds) or back off exponentially
+            delay = portal.BACKOFF * 2**attempt
+            if resp.headers.get("retry-after", "").isdigit():
+                delay = int(resp.headers["retry-after"])
+            resp.release()
+            await asyncio.sleep(delay)
+        # not reached
+        return None
+
+    async def download_with_aiohttp(self, document):
+        """download a file like WebPortal.download_with_requests"""
+        portal = self.portal
+        path = None
+        for attempt in range(portal.RETRIES + 1):
+            try:
+                return await self._download_with_aiohttp(document, path)
+            except docdl.IncompleteDownloadError as exc:
+                if attempt == portal.RETRIES:
+                    raise
+                # continue where the transfer stopped
+                path = exc.path
+                await asyncio.sleep(portal.BACKOFF * 2**attempt)
+        # not reached
+        return None
+
+    async def _download_with_aiohttp(self, document, path=None):
+        """
+        :param document: docdl.Document to download
+        :param path: path of a partial download to resume (if known)
+        :result: path of downloaded file
+        """
+        portal = self.portal
+        headers = {**document.request_headers}
+        # continue partial download of previous run if filename is known
+        if path is None and "filename" in document.attributes:
+            path = portal.target_path(document, portal._filename(document, {}))
+        if path:
+            headers.update(docdl.util.partial.resume_headers(path))
+        # only fetch document if it changed since last download
+        if portal.validators and "Range" not in headers:
+            headers.update(portal.validators.headers(document.url))
+
+        resp = await self._get(document.url, headers)
+        async with resp:
+            # partial download can't be resumed?
+            if resp.status == 416 and "Range" in headers:
+                # start over
+                docdl.util.partial.remove(path)
+                return await self._download_with_aiohttp(document)
+            # document didn't change, reuse local file
+            if resp.status == 304:
+                if not (filename := portal.validators.filename(document.url)):
+                    raise docdl.DownloadError(
+                        f'"{document.url}" not modified but file is gone'
+                    )
+                document.digest = portal.validators.digest(document.url)
+                return filename
+            if resp.status >= 400:
+                raise docdl.DownloadError(
+                    f'"{document.url}" status code: {resp.status}'
+                )
+
+            # save file
+            path = portal.target_path(document, portal._filename(document, resp.headers))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            mode, digest = docdl.util.partial.begin(
+                document.url, resp.status, resp.headers, path
+            )
+            received = 0
+            start = time.monotonic()
+            try:
+                with open(f"{path}.part", mode) as doc:
+                    async for chunk in resp.content.iter_chunked(portal.BUFFER_SIZE):
+                        doc.write(chunk)
+                        digest.update(chunk)
+                        received += len(chunk)
+            # connection dropped or body shorter than content-length
+            except (
+                self.aiohttp.ClientPayloadError,
+                self.aiohttp.ClientConnectionError,
+                asyncio.TimeoutError,
+            ) as exc:
+                raise docdl.IncompleteDownloadError(
+                    f'"{document.url}" truncated: {exc}', path
+                ) from exc
+            portal._statistics(path, received, time.monotonic() - start)
+            # aiohttp checks the length of compressed bodies itself
+            if resp.headers.get("content-encoding", "identity") != "identity":
+                received = None
+            docdl.util.partial.end(document.url, resp.headers, path, received)
+
+        document.digest = digest.hexdigest()
+        if portal.validators:
+            portal.validators.update(
+                document.url, resp.headers, path, document.digest
+            )
+        return path
@@ -0,0 +1,409 @@
+"""daemon that keeps warm chrome browsers for SeleniumWebPortals to attach to"""
+
+import itertools
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import click
+import trio
+import trio_websocket
+
+# ids of devtools commands
+_IDS = itertools.count(1)
+
+
+async def _command(connection, method, **params):
+    """
+    :param connection: trio_websocket connection to the browser
+    :param method: devtools method
+    :param params: parameters of method
+    :result: result of method
+    """
+    request = next(_IDS)
+    await connection.send_message(
+        json.dumps({"id": request, "method": method, "params": params})
+    )
+    while True:
+        message = json.loads(await connection.get_message())
+        if message.get("id") == request:
+            if "error" in message:
+                raise RuntimeError(f"{method}: {message['error'].get('message')}")
+            return message.get("result", {})
+
+
+class Browser:
+    """chrome process with remote debugging enabled"""
+
+    def __init__(self, binary, headless=True):
+        """
+        :param binary: path of chrome executable
+        :param headless: start browser without window
+        """
+        self.binary = binary
+        self.headless = headless
+        self.process = None
+        self.profile = None
+        self.port = None
+
+    @property
+    def debugger_address(self):
+        """:result: host:port to attach chromedriver to"""
+        return f"127.0.0.1:{self.port}"
+
+    def start(self):
+        """launch browser with a fresh profile"""
+        # find free port
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.profile = tempfile.mkdtemp(prefix="document-dl-browser-")
+        # always save PDFs (browser contexts inherit the profile's preferences)
+        os.makedirs(os.path.join(self.profile, "Default"))
+        with open(
+            os.path.join(self.profile, "Default", "Preferences"), "w", encoding="utf-8"
+        ) as preferences:
+            json.dump({"plugins": {"always_open_pdf_externally": True}}, preferences)
+        args = [
+            self.binary,
+            f"--remote-debugging-port={self.port}",
+            f"--user-data-dir={self.profile}",
+            "--no-first-run",
+            "--no-default-browser-check",
+        ]
+        if self.headless:
+            args += ["--headless=new"]
+        # pylint: disable=R1732
+        self.process = subprocess.Popen(
+            args + ["about:blank"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    def stop(self):
+        """kill browser and remove its profile"""
+        if self.process:
+            self.process.terminate()
+            self.process.wait()
+            self.process = None
+        if self.profile:
+            shutil.rmtree(self.profile, ignore_errors=True)
+            self.profile = None
+
+    def restart(self):
+        """start over with a fresh profile"""
+        self.stop()
+        self.start()
+
+    def alive(self):
+        """:result: True if browser process is running"""
+        return self.process is not None and self.process.poll() is None
+
+    def _devtools_url(self, timeout=10):
+        """:result: websocket url of the browser's devtools"""
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with urllib.request.urlopen(
+                    f"http://{self.debugger_address}/json/version", timeout=timeout
+                ) as response:
+                    return json.load(response)["webSocketDebuggerUrl"]
+            # browser is still starting
+            except (urllib.error.URLError, ConnectionError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.2)
+
+    def open_context(self):
+        """
+        open a blank tab in a new browser context and close all other
+        tabs. Cookies, cache and storage of all origins of the context
+        are gone once it's closed.
+
+        :result: tuple of browser context id and target id of the tab
+                 (its window handle)
+        """
+        return trio.run(self._open_context)
+
+    async def _open_context(self):
+        async with trio_websocket.open_websocket_url(self._devtools_url()) as connection:
+            targets = await _command(connection, "Target.getTargets")
+            context = await _command(
+                connection, "Target.createBrowserContext", disposeOnDetach=False
+            )
+            context = context["browserContextId"]
+            target = await _command(
+                connection,
+                "Target.createTarget",
+                url="about:blank",
+                browserContextId=context,
+            )
+            # the client's tab should be the only one
+            for info in targets["targetInfos"]:
+                if info["type"] == "page":
+                    await _command(
+                        connection, "Target.closeTarget", targetId=info["targetId"]
+                    )
+        return context, target["targetId"]
+
+    def close_context(self, context):
+        """
+        close a browser context with all its tabs and data and leave a
+        blank tab
+
+        :param context: browser context id from open_context()
+        """
+        trio.run(self._close_context, context)
+
+    async def _close_context(self, context):
+        async with trio_websocket.open_websocket_url(self._devtools_url()) as connection:
+            # keep the browser open
+            await _command(connection, "Target.createTarget", url="about:blank")
+            await _command(
+                connection, "Target.disposeBrowserContext", browserContextId=context
+            )
+
+
+class BrowserPool:
+    """warm browsers that are leased to one client at a time"""
+
+    def __init__(self, binary, size=1, headless=True):
+        """
+        :param binary: path of chrome executable
+        :param size: amount of browsers to keep running
+        :param headless: start browsers without window
+        """
+        self.browsers = [Browser(binary, headless) for _ in range(max(size, 1))]
+        self.idle = list(self.browsers)
+        self.lock = threading.Lock()
+
+    def start(self):
+        """launch all browsers"""
+        for browser in self.browsers:
+            browser.start()
+
+    def stop(self):
+        """kill all browsers"""
+        for browser in self.browsers:
+            browser.stop()
+
+    def lease(self):
+        """:result: idle Browser or None if all are busy"""
+        with self.lock:
+            if not self.idle:
+                return None
+            browser = self.idle.pop()
+        # replace crashed browsers
+        if not browser.alive():
+            browser.restart()
+        return browser
+
+    def release(self, browser, context=None):
+        """
+        give browser back to the pool
+
+        :param browser: leased Browser
+        :param context: browser context of the lease or None if the
+                        client didn't release the browser properly
+        """
+        # never hand a browser with someone's session to the next client
+        clean = False
+        if context:
+            try:
+                browser.close_context(context)
+                clean = True
+            except Exception:  # pylint: disable=W0703
+                pass
+        if not clean:
+            browser.restart()
+        with self.lock:
+            self.idle.append(browser)
+
+
+class LeaseHandler(socketserver.StreamRequestHandler):
+    """
+    one connection per lease: the client sends {"command": "lease"} and
+    gets {"debugger_address": "host:port", "target": "window handle"}.
+    The client works in a browser context of its own that's discarded
+    when it sends {"command": "release"} after quitting its webdriver.
+    If the connection closes without that, the browser is restarted.
+    """
+
+    def handle(self):
+        browser = None
+        context = None
+        released = False
+        try:
+            for line in self.rfile:
+                command = json.loads(line).get("command")
+                if command == "lease" and not browser:
+                    reply = self._lease()
+                    browser = reply.pop("browser", None)
+                    context = reply.pop("context", None)
+                elif command == "release":
+                    released = True
+                    reply = {}
+                else:
+                    reply = {"error": f"unexpected command: {command}"}
+                self.wfile.write(json.dumps(reply).encode() + b"\n")
+                if released:
+                    break
+        finally:
+            if browser:
+                self.server.pool.release(browser, context if released else None)
+
+    def _lease(self):
+        """:result: reply to a lease command (with browser and context)"""
+        if not (browser := self.server.pool.lease()):
+            return {"error": "no idle browser"}
+        try:
+            context, target = browser.open_context()
+        except Exception as exc:  # pylint: disable=W0703
+            self.server.pool.release(browser)
+            return {"error": f"can't open browser context: {exc}"}
+        return {
+            "debugger_address": browser.debugger_address,
+            "target": target,
+            "browser": browser,
+            "context": context,
+        }
+
+
+class LeaseServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """unix socket server handing out browsers of a BrowserPool"""
+
+    daemon_threads = True
+
+    def __init__(self, path, pool):
+        """
+        :param path: path of unix socket
+        :param pool: BrowserPool to lease browsers from
+        """
+        self.pool = pool
+        super().__init__(path, LeaseHandler)
+
+
+class Lease:
+    """browser leased from a running daemon"""
+
+    def __init__(self, sock, debugger_address, target):
+        """
+        :param sock: connection to daemon (lease ends when it's closed)
+        :param debugger_address: host:port of leased browser
+        :param target: window handle of the tab to use
+        """
+        self.sock = sock
+        self.debugger_address = debugger_address
+        self.target = target
+
+    @classmethod
+    def acquire(cls, path, timeout=5):
+        """
+        :param path: unix socket of daemon
+        :param timeout: seconds to wait for the daemon
+        :result: Lease or None if no browser is available
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+            sock.sendall(json.dumps({"command": "lease"}).encode() + b"\n")
+            reply = json.loads(sock.makefile("rb").readline() or b"{}")
+        except (OSError, ValueError):
+            sock.close()
+            return None
+        if "debugger_address" not in reply:
+            sock.close()
+            return None
+        # keep connection open while the browser is in use
+        sock.settimeout(None)
+        return cls(sock, reply["debugger_address"], reply["target"])
+
+    def release(self):
+        """
+        give browser back to the daemon, which discards everything the
+        lease left in it (call after quitting the webdriver)
+        """
+        try:
+            self.sock.sendall(json.dumps({"command": "release"}).encode() + b"\n")
+            self.sock.recv(1024)
+        except OSError:
+            pass
+        finally:
+            self.sock.close()
+
+
+def _terminate(signum, frame):
+    """signal handler"""
+    raise KeyboardInterrupt
+
+
+def chrome_binary():
+    """:result: path of chrome executable or None"""
+    for name in ("google-chrome", "chromium", "chromium-browser", "chrome"):
+        if path := shutil.which(name):
+            return path
+    return None
+
+
+@click.command(context_settings={"auto_envvar_prefix": "DOCDL_BROWSERD"})
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=os.path.join(click.get_app_dir("document-dl"), "browserd.sock"),
+    show_envvar=True,
+    help="unix socket to listen on",
+    show_default=True,
+)
+@click.option(
+    "--browsers",
+    type=click.IntRange(min=1),
+    default=2,
+    show_envvar=True,
+    help="amount of warm browsers to keep running",
+    show_default=True,
+)
+@click.option(
+    "--headless/--show",
+    default=True,
+    show_envvar=True,
+    help="show/hide browser windows",
+    show_default=True,
+)
+@click.option(
+    "--chrome",
+    "binary",
+    default=chrome_binary,
+    show_envvar=True,
+    help="chrome executable",
+)
+def browserd(socket_path, browsers, headless, binary):
+    """keep chrome browsers running for document-dl --browser-daemon"""
+    if not binary:
+        raise click.UsageError("chrome not found, use --chrome")
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    # remove socket of previous daemon
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    pool = BrowserPool(binary, browsers, headless)
+    pool.start()
+    # let SIGTERM shut down cleanly
+    signal.signal(signal.SIGTERM, _terminate)
+    try:
+        with LeaseServer(socket_path, pool) as server:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
@@ -1,9 +1,15 @@
 """download documents from web portals"""
 
+import contextlib
+import os
 import pkg_resources
 import click
 import click_plugins
 import docdl
+import docdl.aio
+import docdl.pool
+import docdl.util.devtools
+import docdl.util.state
 
 
 @click_plugins.with_plugins(pkg_resources.iter_entry_points("docdl_plugins"))
@@ -90,6 +96,35 @@ import docdl
     help="Turn off image loading when False",
     show_default=True,
 )
+@click.option(
+    "--block-resource",
+    "block_resources",
+    type=click.Choice(["none", *docdl.util.devtools.RESOURCE_TYPES], case_sensitive=False),
+    multiple=True,
+    show_envvar=True,
+    help="resource types the browser shouldn't load instead of the plugin's "
+    "defaults (usually font and media, chrome only blocks image and script "
+    "without --block-requests)",
+)
+@click.option(
+    "--block-url",
+    "block_urls",
+    metavar="PATTERN",
+    multiple=True,
+    show_envvar=True,
+    help="urls the browser shouldn't load in addition to the plugin's defaults "
+    "(* wildcards, chrome only)",
+)
+@click.option(
+    "--block-requests",
+    type=bool,
+    is_flag=True,
+    default=False,
+    show_envvar=True,
+    help="let chrome intercept every request to block all resource types "
+    "(slower, firefox blocks them without)",
+    show_default=True,
+)
 @click.option(
     "-l",
     "--list",
@@ -109,6 +144,149 @@ import docdl
     help="download documents",
     show_default=True,
 )
+@click.option(
+    "-o",
+    "--output-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    show_envvar=True,
+    help="directory to download documents to (default: current directory)",
+)
+@click.option(
+    "--path-template",
+    default="{filename}",
+    show_envvar=True,
+    help="path of downloaded documents inside output directory made of "
+    "{plugin}, {filename} and document attributes, "
+    "e.g. {plugin}/{date:%Y}/{date:%m}/{filename}",
+    show_default=True,
+)
+@click.option(
+    "--jobs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_envvar=True,
+    help="maximum amount of documents to download concurrently",
+    show_default=True,
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["threads", "async"], case_sensitive=False),
+    default="threads",
+    show_envvar=True,
+    help="download documents using a pool of threads or asyncio (needs aiohttp)",
+    show_default=True,
+)
+@click.option(
+    "--pool-size",
+    type=click.IntRange(min=1),
+    default=None,
+    show_envvar=True,
+    help="HTTP connections kept alive per host, at least --jobs "
+    "(default: plugin specific or 10)",
+)
+@click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    default=None,
+    show_envvar=True,
+    help="retry failed GET requests on connection errors, 429, 5xx "
+    "(default: plugin specific or 3)",
+)
+@click.option(
+    "--backoff",
+    type=click.FloatRange(min=0),
+    default=None,
+    show_envvar=True,
+    help="exponential backoff factor between retries in seconds "
+    "(default: plugin specific or 0.5)",
+)
+@click.option(
+    "--rate-limit",
+    type=click.FloatRange(min=0, min_open=True),
+    default=None,
+    show_envvar=True,
+    help="maximum HTTP requests per second per host "
+    "(default: plugin specific or unlimited)",
+)
+@click.option(
+    "--rate-burst",
+    type=click.IntRange(min=1),
+    default=None,
+    show_envvar=True,
+    help="HTTP requests per host that may be sent at once before --rate-limit applies",
+)
+@click.option(
+    "--incremental",
+    type=bool,
+    is_flag=True,
+    default=False,
+    show_envvar=True,
+    help="skip documents that have already been downloaded",
+    show_default=True,
+)
+@click.option(
+    "--state",
+    "state_file",
+    type=click.Path(dir_okay=False),
+    default=os.path.join(click.get_app_dir("document-dl"), "state.sqlite"),
+    show_envvar=True,
+    help="database to remember downloaded documents in for --incremental",
+    show_default=True,
+)
+@click.option(
+    "--http-cache",
+    type=bool,
+    is_flag=True,
+    default=False,
+    show_envvar=True,
+    help="only download documents again if their ETag/Last-Modified changed",
+    show_default=True,
+)
+@click.option(
+    "--store",
+    type=click.Path(file_okay=False),
+    default=None,
+    show_envvar=True,
+    help="hardlink downloaded files to one copy per content in this directory "
+    "(only deduplicates files on the same filesystem)",
+)
+@click.option(
+    "--buffer-size",
+    type=click.IntRange(min=1),
+    default=4 * 1024 * 1024,
+    show_envvar=True,
+    help="maximum amount of bytes read at once while downloading",
+    show_default=True,
+)
+@click.option(
+    "--statistics",
+    type=bool,
+    is_flag=True,
+    default=False,
+    show_envvar=True,
+    help="print download throughput to stderr",
+    show_default=True,
+)
+@click.option(
+    "--profile-dir",
+    type=click.Path(file_okay=False),
+    default=None,
+    show_envvar=True,
+    help="keep browser profiles (cookies, storage, cache) per plugin and account "
+    "in this directory and reuse their sessions instead of logging in/out "
+    "(if the plugin can check the session)",
+)
+@click.option(
+    "--browser-daemon",
+    type=click.Path(dir_okay=False),
+    default=None,
+    show_envvar=True,
+    help="attach to warm chrome browsers of document-dl-browserd listening on "
+    "this socket instead of starting a browser (their options are set by the "
+    "daemon, so --headless/--show and --image-loading are ignored and resource "
+    "types are only blocked with --block-requests)",
+)
 @click.option(
     "-f",
     "--format",
@@ -130,7 +308,7 @@ import docdl
     show_default=True,
 )
 @click.pass_context
-# pylint: disable=W0613,C0103,R0913
+# pylint: disable=W0613,C0103,R0913,R0914
 def documentdl(
     ctx,
     username,
@@ -142,17 +320,34 @@ def documentdl(
     browser,
     timeout,
     image_loading,
+    block_resources,
+    block_urls,
+    block_requests,
     action,
+    output_dir,
+    path_template,
+    jobs,
+    engine,
+    pool_size,
+    retries,
+    backoff,
+    rate_limit,
+    rate_burst,
+    incremental,
+    state_file,
+    http_cache,
+    store,
+    buffer_size,
+    statistics,
+    profile_dir,
+    browser_daemon,
     output_format,
     debug,
 ):
     """download documents from web portals"""
-    # set browser that SeleniumWebPortal plugins should use
-    docdl.SeleniumWebPortal.WEBDRIVER = browser
-    # set default request timeout
-    docdl.WebPortal.TIMEOUT = timeout
 
 
+# pylint: disable=R0914
 def run(ctx, plugin_class):
     """this gets called by plugins with their click context"""
     # get our root context
@@ -160,6 +355,14 @@ def run(ctx, plugin_class):
     root_params = root_ctx.params
     params = ctx.params
 
+    # remember downloaded documents?
+    if root_params["incremental"]:
+        state_db = docdl.util.state.State(
+            root_params["state_file"], ctx.info_name, root_params["username"]
+        )
+    else:
+        state_db = contextlib.nullcontext()
+
     # initialize plugin
     plugin = plugin_class(
         login_id=root_params["username"],
@@ -169,16 +372,80 @@ def run(ctx, plugin_class):
             "webdriver": {
                 "headless": root_params["headless"],
                 "load_images": root_params["image_loading"],
+                "block_resources": root_params["block_resources"],
+                "block_urls": root_params["block_urls"],
+                "block_requests": root_params["block_requests"],
+            },
+            # override settings of the plugin class (None keeps them)
+            "settings": {
+                # browser that SeleniumWebPortal plugins should use
+                "webdriver": root_params["browser"],
+                # default request timeout
+                "timeout": root_params["timeout"],
+                # HTTP connection pool size and retry behaviour
+                "pool_size": root_params["pool_size"],
+                "retries": root_params["retries"],
+                "backoff": root_params["backoff"],
+                # override plugin specific rate limits
+                "rate_limit": root_params["rate_limit"],
+                "rate_burst": root_params["rate_burst"],
+                # download buffer size
+                "buffer_size": root_params["buffer_size"],
+                # report download throughput
+                "statistics": root_params["statistics"],
             },
+            # amount of concurrent downloads
+            "jobs": root_params["jobs"],
+            # name of plugin
+            "plugin": ctx.info_name,
+            # where to put downloaded files
+            "output_dir": root_params["output_dir"],
+            "path_template": root_params["path_template"],
+            # use conditional GETs for downloads
+            "http_cache": root_params["http_cache"],
+            # deduplicate downloaded files
+            "store": root_params["store"],
+            # persistent browser profiles
+            "profile_dir": root_params["profile_dir"],
+            # attach to browser daemon
+            "browser_daemon": root_params["browser_daemon"],
+            # documents of previous runs (plugins may stop enumerating early)
+            "state": state_db if root_params["incremental"] else None,
             # pass plugin params directly to plugin
             **params,
         },
     )
 
+    # choose download engine
+    if root_params["engine"] == "async":
+        pool_class = docdl.aio.AsyncDownloadPool
+    else:
+        pool_class = docdl.pool.DownloadPool
+
     # let's go
-    with plugin as portal:
+    with state_db as state, plugin as portal, pool_class(
+        portal, root_params["jobs"]
+    ) as pool:
         # list of documents
         result = []
+
+        def output(document):
+            nonlocal result
+            # remember downloaded file
+            if (
+                state
+                and root_params["action"] == "download"
+                and os.path.isfile(document.attributes.get("path", ""))
+            ):
+                state.add(document, document.attributes["path"])
+            # line buffered dict output?
+            if root_params["output_format"] == "dicts":
+                # always output as json dict
+                click.echo(document.toJSON())
+            # just store result for later
+            else:
+                result += [document.toJSON()]
+
         # walk all documents found
         for document in portal.documents():
             # filter document
@@ -190,16 +457,21 @@ def run(ctx, plugin_class):
             # skip filtered documents
             if not filtered:
                 continue
+            # skip documents downloaded by previous runs
+            if state and state.downloaded(document):
+                continue
             # download ?
             if root_params["action"] == "download":
-                portal.download(document)
-            # line buffered dict output?
-            if root_params["output_format"] == "dicts":
-                # always output as json dict
-                click.echo(document.toJSON())
-            # just store result for later
+                pool.submit(document)
+                # output documents that finished downloading meanwhile
+                for finished in pool.finished():
+                    output(finished)
             else:
-                result += [document.toJSON()]
+                output(document)
+
+        # wait for remaining downloads
+        for finished in pool.finished(wait=True):
+            output(finished)
 
         # output json list?
         if root_params["output_format"] == "list":
@@ -0,0 +1,21 @@
+"""exceptions raised by plugins and downloads"""
+
+
+class AuthenticationError(Exception):
+    """authentication failure"""
+
+
+class DownloadError(Exception):
+    """download failure"""
+
+
+class IncompleteDownloadError(DownloadError):
+    """download was truncated (and can be resumed)"""
+
+    def __init__(self, message, path):
+        """
+        :param message: error message
+        :param path: path of file whose partial download was kept
+        """
+        super().__init__(message)
+        self.path = path
@@ -4,17 +4,85 @@ download documents from Amazon
 @todo handle "add mobile phone number?" dialog after login
 """
 
+import concurrent.futures
+import html.parser
+import itertools
 import re
+import urllib.parse
 import click
+import requests
 from slugify import slugify
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import Select
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
+class _OrderDetails(html.parser.HTMLParser):
+    """order date/number, product name and invoice urls of an order-details page"""
+
+    # elements without end tag
+    VOID_ELEMENTS = set(
+        "area base br col embed hr img input link meta param source track wbr".split()
+    )
+
+    def __init__(self, url):
+        """
+        :param url: url of the page (to resolve relative links)
+        """
+        super().__init__()
+        self.url = url
+        # contents of span.order-date-invoice-item
+        self.date_nr = []
+        self.product_name = None
+        self.invoice_urls = set()
+        # page contains .a-alert-container
+        self.alert = False
+        # open elements: [tag, attributes, field to collect text for, text]
+        self.stack = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        href = attrs.get("href") or ""
+        if "a-alert-container" in classes:
+            self.alert = True
+        # parent is <div class="a-row">?
+        parent = self.stack[-1] if self.stack else [None, {}]
+        in_row = parent[0] == "div" and parent[1].get("class") == "a-row"
+        field = None
+        if tag == "span" and "order-date-invoice-item" in classes:
+            field = "date_nr"
+        elif tag == "a" and ".pdf" in href:
+            self.invoice_urls.add(urllib.parse.urljoin(self.url, href))
+        # first product link of a div.a-row
+        elif tag == "a" and "/product/" in href and in_row and not self.product_name:
+            field = "product_name"
+        if tag not in self.VOID_ELEMENTS:
+            self.stack.append([tag, attrs, field, []])
+
+    def handle_data(self, data):
+        for element in self.stack:
+            if element[2]:
+                element[3].append(data)
+
+    def handle_endtag(self, tag):
+        # find element (closes elements without end tag, too)
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                break
+        else:
+            return
+        for _, _, field, text in reversed(self.stack[index:]):
+            if field == "date_nr":
+                self.date_nr += ["".join(text).strip()]
+            elif field == "product_name" and self.product_name is None:
+                self.product_name = "".join(text).strip()
+        del self.stack[index:]
+
+
 class Amazon(docdl.SeleniumWebPortal):
     """
     download documents from Amazon
@@ -23,13 +91,33 @@ class Amazon(docdl.SeleniumWebPortal):
           runs.
     """
 
+    # requests per second to amazon (don't get throttled)
+    RATE_LIMIT = 2
+    RATE_BURST = 4
+    # order-detail pages to fetch concurrently
+    DETAIL_JOBS = 4
+    # links of the order history and its infinite-scroll indicator
+    ORDER_DETAIL_LINKS = "//a[contains(@href, 'order-details')]"
+    ORDERS_LOADING = ".rhf-loading-inner"
+    # order history only needs the markup
+    BLOCK_RESOURCES = ["image", "font", "media"]
+    BLOCK_URLS = docdl.SeleniumWebPortal.BLOCK_URLS + [
+        "*amazon-adsystem.com/*",
+        "*fls-eu.amazon.*",
+        "*fls-na.amazon.*",
+        "*unagi*.amazon.*",
+        "*/uedata*",
+    ]
+    # captcha images have to be shown to the user
+    ALLOW_URLS = ["*captcha*"]
+
     def login(self):
         # use this toplevel domain
         tld = self.arguments["tld"]
         # load homepage
         self.webdriver.get(f"https://amazon.{tld}")
         # wait for account-link or captcha request
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.presence_of_element_located(
                 (
                     By.XPATH,
@@ -45,7 +133,7 @@ class Amazon(docdl.SeleniumWebPortal):
             self._handle_captcha(captcha_entry)
 
         # get loginbutton
-        loginbutton = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        loginbutton = self.wait_until(
             EC.presence_of_element_located(
                 (
                     By.XPATH,
@@ -99,6 +187,58 @@ class Amazon(docdl.SeleniumWebPortal):
     def documents(self):
         # count all documents
         i = 0
+        # iterate orders
+        for details in self._orders():
+            # invoice urls (without doubles)
+            invoice_urls = details.invoice_urls
+            # extract items that contain order number and order date
+            date, order_nr = details.date_nr[:2]
+            # parse date
+            date = re.match(r"[^\d]*(.+)$", date)[1]
+            date = docdl.util.parse_date(date)
+            # parse order number
+            order_nr = re.match(r"[^\d]*(.+)$", order_nr)[1]
+            # get product name
+            product_name = details.product_name
+            # some orders don't have invoices
+            if len(invoice_urls) == 0:
+                # generate empty entry with warning
+                yield docdl.Document(
+                    url=None,
+                    attributes={
+                        "date": date,
+                        "order": order_nr,
+                        "id": i,
+                        "product": product_name,
+                        "warning": "no invoice available!",
+                    },
+                )
+                continue
+
+            # generate invoices
+            for url in invoice_urls:
+                filename = (
+                    f"amazon-{date.strftime('%Y%m%d')}-"
+                    f"{order_nr}-{slugify(product_name)}.pdf"
+                )
+                yield docdl.Document(
+                    url=url,
+                    attributes={
+                        "date": date,
+                        "order": order_nr,
+                        "id": i,
+                        "product": product_name,
+                        "filename": filename,
+                    },
+                )
+                # increment counter
+                i += 1
+
+    def _orders(self):
+        """
+        generator of _OrderDetails of all orders (newest first). In
+        incremental mode, stop at the first order downloaded before.
+        """
         # use this toplevel domain
         tld = self.arguments["tld"]
         # load page with orders
@@ -119,105 +259,128 @@ class Amazon(docdl.SeleniumWebPortal):
                 self.webdriver.back()
             # select current orderfilter option
             self._set_orderfilter(option)
-            # scroll down to load all orders
-            self._load_all_orders()
-            # save all order detail links
-            order_detail_links = [
-                e.get_attribute("href")
-                for e in self.webdriver.find_elements(
-                    By.XPATH, "//a[contains(@href, 'order-details')]"
-                )
-            ]
             # iterate order-detail pages
-            for order_link in order_detail_links:
-                # go back to order overview except if we already are on
-                # the overview page
-                if "order-details" in self.webdriver.current_url:
-                    self.webdriver.back()
-                # load order details page
-                self.webdriver.get(order_link)
-                # wait for invoice links or alert
-                if not self._wait_for_result(
-                    By.CSS_SELECTOR,
-                    ".order-date-invoice-item",
-                    By.CSS_SELECTOR,
-                    ".a-alert-container",
-                ):
-                    # skip on alert
-                    continue
-                # get all invoice urls
-                invoice_urls = self.webdriver.find_elements(
-                    By.XPATH, "//a[contains(@href, '.pdf')]"
-                )
-                # remove doubles
-                invoice_urls = set(e.get_attribute("href") for e in invoice_urls)
-                # extract items that contain order number and order date
-                date_nr = self.webdriver.find_elements(
-                    By.CSS_SELECTOR, "span.order-date-invoice-item"
-                )
-                date = date_nr[0].get_attribute("textContent").strip()
-                order_nr = date_nr[1].get_attribute("textContent").strip()
-                # parse date
-                date = re.match(r"[^\d]*(.+)$", date)[1]
-                date = docdl.util.parse_date(date)
-                # parse order number
-                order_nr = re.match(r"[^\d]*(.+)$", order_nr)[1]
-                # get product name
-                product_name = (
-                    self.webdriver.find_element(
-                        By.XPATH,
-                        "//div[@class='a-row']/a[contains(@href, '/product/')]",
+            for order_detail_links in self._order_detail_links():
+                # orders before the first one known from previous runs
+                new_links = list(
+                    itertools.takewhile(
+                        lambda link: not self._known(link), order_detail_links
                     )
-                    .get_attribute("textContent")
-                    .strip()
                 )
-                # some orders don't have invoices
-                if len(invoice_urls) == 0:
-                    # generate empty entry with warning
-                    yield docdl.Document(
-                        url=None,
-                        attributes={
-                            "date": date,
-                            "order": order_nr,
-                            "id": i,
-                            "product": product_name,
-                            "warning": "no invoice available!",
-                        },
-                    )
-                    continue
+                for details in self._order_details(new_links):
+                    # skip on alert
+                    if details:
+                        yield details
+                # all older orders are known, too
+                if len(new_links) < len(order_detail_links):
+                    return
 
-                # generate invoices
-                for url in invoice_urls:
-                    filename = (
-                        f"amazon-{date.strftime('%Y%m%d')}-"
-                        f"{order_nr}-{slugify(product_name)}.pdf"
-                    )
-                    yield docdl.Document(
-                        url=url,
-                        attributes={
-                            "date": date,
-                            "order": order_nr,
-                            "id": i,
-                            "product": product_name,
-                            "filename": filename,
-                        },
-                    )
-                    # increment counter
-                    i += 1
+    def _order_detail_links(self):
+        """
+        generator of lists of order-detail links on the current page.
+        In incremental mode, yield the visible orders before loading
+        more.
+        """
+        seen = set()
+        while True:
+            # scroll down to load all orders
+            if not self.state:
+                self.load_all(self.ORDER_DETAIL_LINKS, loading=self.ORDERS_LOADING)
+            links = [
+                order["href"]
+                for order in self.extract_table(
+                    self.ORDER_DETAIL_LINKS, {"href": ("", "href")}
+                )
+            ]
+            # links of orders we didn't see yet (without doubles)
+            links = [link for link in dict.fromkeys(links) if link not in seen]
+            seen.update(links)
+            if links:
+                yield links
+            if not self.state:
+                return
+            # orders that had to be loaded by the browser left the overview
+            if "order-details" in self.webdriver.current_url:
+                self.webdriver.back()
+            # all orders loaded?
+            if not self._load_more_orders():
+                return
+
+    def _known(self, order_link):
+        """:result: True if order was downloaded by previous runs"""
+        if not self.state:
+            return False
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(order_link).query)
+        return any(self.state.known("order", order) for order in query.get("orderID", []))
+
+    def _order_details(self, order_detail_links):
+        """
+        fetch order-detail pages with the requests session in parallel
+
+        :param order_detail_links: urls of order-detail pages
+        :result: generator of _OrderDetails (None for orders with alerts)
+        """
+        # use cookies of the browser
+        self.copy_to_requests_session()
+        with concurrent.futures.ThreadPoolExecutor(self.DETAIL_JOBS) as executor:
+            for order_link, details in zip(
+                order_detail_links,
+                executor.map(self._fetch_order_details, order_detail_links),
+            ):
+                # not what the browser would have gotten (e.g. a captcha)?
+                if details is not None and not details.date_nr:
+                    details = self._browse_order_details(order_link)
+                yield details
+
+    def _fetch_order_details(self, order_link):
+        """:result: _OrderDetails of order_link (empty on failure)"""
+        try:
+            response = self.session.get(order_link, timeout=self.TIMEOUT)
+            response.raise_for_status()
+        except requests.RequestException:
+            return _OrderDetails(order_link)
+        details = _OrderDetails(response.url)
+        details.feed(response.text)
+        details.close()
+        # skip orders with alerts (unless we were sent to some login page)
+        if details.alert and "order-details" in response.url:
+            return None
+        return details
+
+    def _browse_order_details(self, order_link):
+        """:result: _OrderDetails of order_link loaded by the browser"""
+        # load order details page
+        self.webdriver.get(order_link)
+        # wait for invoice links or alert
+        if not self._wait_for_result(
+            By.CSS_SELECTOR,
+            ".order-date-invoice-item",
+            By.CSS_SELECTOR,
+            ".a-alert-container",
+        ):
+            return None
+        details = _OrderDetails(self.webdriver.current_url)
+        details.feed(self.webdriver.page_source)
+        details.close()
+        return details
 
     def _orderfilter_options(self):
         # wait for dropdown to select orders
         # (last months, years, archived)
-        orderfilter = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        orderfilter = self.wait_until(
             EC.presence_of_element_located((By.XPATH, ".//select[@name='orderFilter']"))
         )
-        # extract values of year options
-        options = [
-            o.get_attribute("value")
-            for o in orderfilter.find_elements(
-                By.XPATH, ".//option[contains(@value, 'year')]"
-            )
-        ]
+        # extract values of year options (newest first)
+        options = sorted(
+            (
+                o.get_attribute("value")
+                for o in orderfilter.find_elements(
+                    By.XPATH, ".//option[contains(@value, 'year')]"
+                )
+            ),
+            key=lambda option: re.sub(r"\D", "", option).zfill(4),
+            reverse=True,
+        )
         # got "archived" order filter option?
         if orderfilter.find_elements(
             By.XPATH, ".//option[contains(@value, 'archived')]"
@@ -228,38 +391,25 @@ class Amazon(docdl.SeleniumWebPortal):
 
     def _set_orderfilter(self, option):
         # find <select> for order filter
-        orderfilter = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        orderfilter = self.wait_until(
             EC.presence_of_element_located((By.XPATH, ".//select[@name='orderFilter']"))
         )
         # move <select> to front
         self.webdriver.execute_script("arguments[0].style.zIndex='99'", orderfilter)
-        orderfilter = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        orderfilter = self.wait_until(
             EC.element_to_be_clickable((By.XPATH, ".//select[@name='orderFilter']"))
         )
         # select current option
         orderfilter_select = Select(orderfilter)
         orderfilter_select.select_by_value(option)
 
-    def _load_all_orders(self):
-        # scroll down to load all orders
-        while True:
-            # get current height
-            height = self.webdriver.execute_script(
-                "return document.documentElement.scrollHeight"
-            )
-            # scroll to bottom
-            self.scroll_to_bottom()
-            # wait for loader to disappear
-            WebDriverWait(self.webdriver, self.TIMEOUT).until(
-                EC.invisibility_of_element_located(
-                    (By.CSS_SELECTOR, ".rhf-loading-inner")
-                )
-            )
-            # loop until height doesn't change
-            if height == self.webdriver.execute_script(
-                "return document.documentElement.scrollHeight"
-            ):
-                break
+    def _load_more_orders(self):
+        """:result: True if scrolling down loaded more orders"""
+        count = len(self.webdriver.find_elements(By.XPATH, self.ORDER_DETAIL_LINKS))
+        return (
+            self.load_all(self.ORDER_DETAIL_LINKS, loading=self.ORDERS_LOADING, steps=1)
+            > count
+        )
 
     def _handle_captcha(self, captcha_entry):
         # find_elements returns list, we need
@@ -276,7 +426,7 @@ class Amazon(docdl.SeleniumWebPortal):
 
     def _send_username(self):
         # wait for email page
-        email = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        email = self.wait_until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "input#ap_email"))
         )
         # send username
@@ -291,9 +441,11 @@ class Amazon(docdl.SeleniumWebPortal):
 
     def _wait_for_result(self, success_by, success_selector, error_by, error_selector):
         # wait for success element or error dialog
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
-            lambda d: d.find_elements(success_by, success_selector)
-            or d.find_elements(error_by, error_selector)
+        self.wait_until(
+            EC.any_of(
+                EC.presence_of_element_located((success_by, success_selector)),
+                EC.presence_of_element_located((error_by, error_selector)),
+            )
         )
         # error ?
         if self.webdriver.find_elements(error_by, error_selector):
@@ -4,10 +4,9 @@ import itertools
 import click
 from selenium.webdriver import ActionChains
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import docdl
+from docdl.util import conditions as EC
 
 
 class BelieveBackstage(docdl.SeleniumWebPortal):
@@ -22,11 +21,11 @@ class BelieveBackstage(docdl.SeleniumWebPortal):
         # load login page
         self.webdriver.get(self.URL_ROOT)
         # wait for page to load
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.visibility_of_element_located((By.XPATH, "//input[@id='signInName']"))
         )
         # wait form to become interactive
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.element_to_be_clickable((By.XPATH, "//input[@id='signInName']"))
         )
         # find input fields
@@ -47,7 +46,7 @@ class BelieveBackstage(docdl.SeleniumWebPortal):
         loginbutton.click()
 
         # wait for either login error message box or success message
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.visibility_of_element_located(
                 (
                     By.XPATH,
@@ -80,7 +79,7 @@ class BelieveBackstage(docdl.SeleniumWebPortal):
         # fetch report overview
         self.webdriver.get(self.URL_REPORTS)
         # wait for modal
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.visibility_of_element_located(
                 (
                     By.XPATH,
@@ -95,7 +94,7 @@ class BelieveBackstage(docdl.SeleniumWebPortal):
         if closebutton.is_displayed():
             closebutton.click()
         # wait for a download button
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//a[contains(@class, 'fa-download')]")
             )
@@ -108,25 +107,24 @@ class BelieveBackstage(docdl.SeleniumWebPortal):
                 By.XPATH, "//table[contains(@class,'table')]"
             ).find_element(By.XPATH, ".//tbody")
             # iterate all rows
-            for row in tbody.find_elements(By.XPATH, ".//tr"):
-                elements = list(row.find_elements(By.XPATH, ".//td"))
-                ident = elements[0].text
-                report_type = elements[1].text
-                amount = elements[2].text
-                date = elements[3].text.replace("\n", " ")
-                url = (
-                    elements[5]
-                    .find_element(By.XPATH, ".//a[contains(@class, 'fa-download')]")
-                    .get_attribute("href")
-                )
-
+            for row in self.extract_table(
+                ".//tr",
+                {
+                    "ident": (":scope > td:nth-of-type(1)", "innerText"),
+                    "report_type": (":scope > td:nth-of-type(2)", "innerText"),
+                    "amount": (":scope > td:nth-of-type(3)", "innerText"),
+                    "date": (":scope > td:nth-of-type(4)", "innerText"),
+                    "url": (":scope > td:nth-of-type(6) a.fa-download", "href"),
+                },
+                root=tbody,
+            ):
                 yield docdl.Document(
-                    url=url,
+                    url=row["url"],
                     attributes={
-                        "date": docdl.util.parse_date(date),
-                        "category": report_type,
-                        "id": ident,
-                        "amount": amount,
+                        "date": docdl.util.parse_date(row["date"].replace("\n", " ")),
+                        "category": row["report_type"],
+                        "id": row["ident"],
+                        "amount": row["amount"],
                     },
                 )
 
@@ -143,9 +141,7 @@ class BelieveBackstage(docdl.SeleniumWebPortal):
             # go to next page
             nextbutton[0].click()
             # wait until we become stale (page loaded then)
-            WebDriverWait(self.webdriver, self.TIMEOUT).until(
-                EC.staleness_of(nextbutton[0])
-            )
+            self.wait_until(EC.staleness_of(nextbutton[0]))
 
 
 @click.command()
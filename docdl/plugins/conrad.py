@@ -3,10 +3,10 @@
 import re
 import click
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import Select
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
@@ -21,10 +21,10 @@ class Conrad(docdl.SeleniumWebPortal):
         # load login page
         self.webdriver.get(self.URL_LOGIN)
         # find fields
-        username = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        username = self.wait_until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "input#username"))
         )
-        password = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        password = self.wait_until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "input#password"))
         )
         # enter credentials
@@ -37,14 +37,14 @@ class Conrad(docdl.SeleniumWebPortal):
         # wait for page to load
         current_url = self.wait_for_urlchange(current_url)
         # wait for either login success or failure
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
-            lambda d: "Mein Konto" in d.title or "Conrad" in d.title
+        self.wait_until(
+            EC.any_of(EC.title_contains("Mein Konto"), EC.title_contains("Conrad"))
         )
         # Login failed
         if "Conrad" in self.webdriver.title:
             return False
         # close cookie notification
-        cookie_button = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        cookie_button = self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//*[contains(text(), 'Ablehnen')]")
             )
@@ -57,13 +57,13 @@ class Conrad(docdl.SeleniumWebPortal):
 
     def documents(self):
         # wait for loader icon to disappear
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.invisibility_of_element_located((By.CSS_SELECTOR, "div.vld-icon"))
         )
         # load list of invoices
         self.webdriver.get(self.URL_INVOICES)
         # wait for time period selection
-        time_period = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        time_period = self.wait_until(
             EC.presence_of_element_located(
                 (By.XPATH, "//select[@name='timePeriodProperty']")
             )
@@ -72,51 +72,33 @@ class Conrad(docdl.SeleniumWebPortal):
         # show all invoices
         time_period_select.select_by_visible_text("Alle Rechnungen")
         # wait for loader icon to disappear
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.invisibility_of_element_located((By.CSS_SELECTOR, "div.vld-icon"))
         )
         # iterate all invoices
         for i, invoice in enumerate(
-            self.webdriver.find_elements(By.XPATH, "//a[@data-e2e='invoiceList-item']")
+            self.extract_table(
+                "//a[@data-e2e='invoiceList-item']",
+                {
+                    "element": ("", "element"),
+                    "title": "div[data-e2e='invoiceListItem-title']",
+                    "number": "div[data-e2e='invoiceListItem-invoiceNumber']",
+                    "doctype": "div[data-e2e='invoiceListItem-type']",
+                    "amount": "div[data-e2e='invoiceListItem-amount']",
+                },
+            )
         ):
             # get attributes
-            title = (
-                invoice.find_element(
-                    By.XPATH, ".//div[@data-e2e='invoiceListItem-title']"
-                )
-                .get_attribute("textContent")
-                .strip()
-            )
-            date = re.match(r".*(\d{2}\.\d{2}\.\d{4})", title)[1]
-            number = (
-                invoice.find_element(
-                    By.XPATH, ".//div[@data-e2e='invoiceListItem-invoiceNumber']"
-                )
-                .get_attribute("textContent")
-                .strip()
-            )
-            doctype = (
-                invoice.find_element(
-                    By.XPATH, ".//div[@data-e2e='invoiceListItem-type']"
-                )
-                .get_attribute("textContent")
-                .strip()
-                .lower()
-            )
-            amount = (
-                invoice.find_element(
-                    By.XPATH, ".//div[@data-e2e='invoiceListItem-amount']"
-                )
-                .get_attribute("textContent")
-                .strip()
-            )
+            date = re.match(r".*(\d{2}\.\d{2}\.\d{4})", invoice["title"])[1]
+            number = invoice["number"]
+            doctype = invoice["doctype"].lower()
             # strip currency symbol
-            amount = re.match(r"[^\d]*(\d+,\d+).*", amount)[1]
+            amount = re.match(r"[^\d]*(\d+,\d+).*", invoice["amount"])[1]
             # create filename
             filename = f"conrad-{date.replace('.','-')}-{doctype}-{number}.pdf"
             # create document
             yield docdl.Document(
-                download_element=invoice,
+                download_element=invoice["element"],
                 attributes={
                     "date": docdl.util.parse_date(date),
                     "number": number,
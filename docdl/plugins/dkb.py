@@ -4,11 +4,11 @@ import itertools
 import re
 import sys
 import click
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
@@ -19,19 +19,46 @@ class DKB(docdl.SeleniumWebPortal):
     URL_LOGOUT = "https://www.dkb.de/DkbTransactionBanking/banner.xhtml?$event=logout"
     URL_INBOX = "https://www.dkb.de/banking/postfach"
 
+    # requests per second to dkb.de (don't get locked out)
+    RATE_LIMIT = 1
+    RATE_BURST = 2
+    # photoTAN QR-code must load even if images are blocked
+    ALLOW_URLS = ["https://*.dkb.de/*"]
+
     def __init__(self, login_id, password, useragent=None, arguments=None):
         """use custom init to force image loading (for photoTAN)"""
         if arguments and "load_images" in arguments and not arguments["load_images"]:
             arguments["load_images"] = True
         super().__init__(login_id, password, useragent, arguments)
 
+    def is_logged_in(self):
+        # logged in sessions are redirected to the financial status
+        self.webdriver.get(self.URL_LOGIN)
+        try:
+            self.wait_until(
+                EC.any_of(
+                    EC.url_contains("financialstatus"),
+                    EC.presence_of_element_located(
+                        (By.XPATH, "//input[@id='loginInputSelector']")
+                    ),
+                )
+            )
+        except TimeoutException:
+            return False
+        return "financialstatus" in self.webdriver.current_url
+
     def login(self):
         # load login page
         self.webdriver.get(self.URL_LOGIN)
         # wait for username entry
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
-            lambda d: d.find_elements(By.XPATH, "//input[@id='loginInputSelector']")
-            or d.find_elements(By.XPATH, "//button[contains(text(), 'annehmen')]")
+        self.wait_until(
+            EC.presence_of_element_located(
+                (
+                    By.XPATH,
+                    "//input[@id='loginInputSelector'] | "
+                    "//button[contains(text(), 'annehmen')]",
+                )
+            )
         )
         # cookiebanner?
         if cookiebutton := self.webdriver.find_elements(
@@ -51,7 +78,7 @@ class DKB(docdl.SeleniumWebPortal):
         password.send_keys(self.password)
         password.submit()
         # wait for photoTAN or "confirm with TAN" button
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.visibility_of_element_located(
                 (
                     By.XPATH,
@@ -75,14 +102,14 @@ class DKB(docdl.SeleniumWebPortal):
             nextbutton = self.webdriver.find_element(By.XPATH, "//button[@id='next']")
             nextbutton.click()
             # get qrcode
-            qrcode = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+            qrcode = self.wait_until(
                 EC.visibility_of_element_located((By.XPATH, "//img[@alt='QR-Code']"))
             )
         # got qrcode
         else:
             qrcode = qrcode[0]
         # wait for QR code to be fully loaded
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(EC.visibility_of(qrcode))
+        self.wait_until(EC.visibility_of(qrcode))
         # save current url
         current_url = self.webdriver.current_url
         # startcode
@@ -105,7 +132,7 @@ class DKB(docdl.SeleniumWebPortal):
         # wait for page to load
         self.wait_for_urlchange(current_url)
         # wait for logout button
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             lambda d: "financialstatus" in d.current_url
             or "LoginWithTan" in d.current_url
             or d.current_url.endswith("banking")
@@ -129,66 +156,43 @@ class DKB(docdl.SeleniumWebPortal):
     # ~ pass
 
     def _inbox(self):
-        def get_catlinks(table):
-            """get links of all categories and return them as list of tuples"""
-            catlinks = []
-            for row in table.find_elements(
-                By.XPATH, "//table[@id='welcomeMboTable']/tbody/tr"
-            ):
-                # get category
-                category = row.get_attribute("id").lower()
-                # get link to open category
-                subject = row.find_element(By.CSS_SELECTOR, "td.subject")
-                catlink = subject.find_element(By.CSS_SELECTOR, "a")
-                url = catlink.get_attribute("href")
-                catlinks += [(category, url)]
-            return catlinks
-
         # load inbox
         self.webdriver.get(self.URL_INBOX)
         # wait for table
-        table = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//table[@id='welcomeMboTable']")
             )
         )
-        # iterate all category rows and collect links to categories
-        catlinks = get_catlinks(table)
+        # collect links of all categories
+        catlinks = self.extract_table(
+            "//table[@id='welcomeMboTable']/tbody/tr",
+            {"category": ("", "id"), "url": ("td.subject a", "href")},
+        )
 
         # iterate all categories
-        for category, catlink in catlinks:
-            self.webdriver.get(catlink)
+        for catlink in catlinks:
+            self.webdriver.get(catlink["url"])
             # iterate all pages
             while True:
                 # iterate all documents
-                for row in self.webdriver.find_elements(
-                    By.CSS_SELECTOR, "table tbody tr.mbo-folderview-message"
+                for row in self.extract_table(
+                    "table tbody tr.mbo-folderview-message",
+                    {
+                        "classes": ("", "className"),
+                        "date": "div.show-for-small-down",
+                        "url": (".//td/a[@tid='getMailboxAttachment']", "href"),
+                        "topic": ".//td/a[@tid='getMailboxAttachment']",
+                    },
                 ):
-                    # get read state
-                    classes = row.get_attribute("class")
-                    unread = "mbo-messageState-read" not in classes
-
-                    # get date
-                    date = (
-                        row.find_element(By.CSS_SELECTOR, "div.show-for-small-down")
-                        .get_attribute("textContent")
-                        .strip()
-                    )
-
-                    # get link to document
-                    link = row.find_element(
-                        By.XPATH, ".//td/a[@tid='getMailboxAttachment']"
-                    )
-                    url = link.get_attribute("href")
-                    topic = link.get_attribute("textContent").strip()
                     # create document
                     yield docdl.Document(
-                        url=url,
+                        url=row["url"],
                         attributes={
-                            "date": docdl.util.parse_date(date),
-                            "category": category,
-                            "subject": topic,
-                            "unread": unread,
+                            "date": docdl.util.parse_date(row["date"]),
+                            "category": catlink["category"].lower(),
+                            "subject": row["topic"],
+                            "unread": "mbo-messageState-read" not in row["classes"],
                         },
                     )
 
@@ -209,7 +213,7 @@ class DKB(docdl.SeleniumWebPortal):
             nextbutton = nextspan[0].find_element(By.XPATH, "a")
             self.webdriver.get(nextbutton.get_attribute("href"))
             # wait for new folderview
-            WebDriverWait(self.webdriver, self.TIMEOUT).until(
+            self.wait_until(
                 EC.visibility_of_element_located(
                     (By.CSS_SELECTOR, "table.expandableTable tbody")
                 )
@@ -4,10 +4,9 @@ import re
 import click
 from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
@@ -27,7 +26,7 @@ class Elster(docdl.SeleniumWebPortal):
         )
         password = self.webdriver.find_element(By.XPATH, "//input[@id='password']")
         # wait for entry field
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(EC.visibility_of(password))
+        self.wait_until(EC.visibility_of(password))
         # fill in form
         certfile.send_keys(self.login_id)
         password.send_keys(self.password)
@@ -36,7 +35,7 @@ class Elster(docdl.SeleniumWebPortal):
         loginbutton.click()
 
         # wait for either login error message box or success message
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.visibility_of_element_located(
                 (
                     By.XPATH,
@@ -63,64 +62,58 @@ class Elster(docdl.SeleniumWebPortal):
             # iterate all rows of table
             while True:
                 # wait for table
-                posteingang = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+                posteingang = self.wait_until(
                     EC.presence_of_element_located(
                         (By.CSS_SELECTOR, "#posteingangModel tbody")
                     )
                 )
-                # find all rows on this page
-                rows = posteingang.find_elements(By.CSS_SELECTOR, "tr")
+                # read all rows on this page (again, downloads change the page)
+                rows = self.extract_table(
+                    "tr",
+                    {
+                        "downloadbutton": (
+                            ".//td[@data-rwd='Betreff']/*/button",
+                            "element",
+                        ),
+                        "betreff": ".//td[@data-rwd='Betreff']/*/button",
+                        "gelesen": ("span.icon", "title"),
+                        "ordnungskriterium": ".//td[@data-rwd='Ordnungskriterium']",
+                        "profil": ".//td[@data-rwd='Profil']",
+                        "absender": ".//td[@data-rwd='Absender']",
+                        "datum": ".//td[@data-rwd='Datum']",
+                    },
+                    root=posteingang,
+                )
                 # last row?
                 if i_page >= len(rows):
                     # done
                     break
                 # get current row
                 row = rows[i_page]
-                # get columns
-                downloadbutton = WebDriverWait(row, self.TIMEOUT).until(
-                    EC.presence_of_element_located(
-                        (By.XPATH, ".//td[@data-rwd='Betreff']/*/button")
+                # wait for the download button of the row
+                if row["downloadbutton"] is None:
+                    self.wait_until(
+                        EC.presence_of_element_located(
+                            (
+                                By.XPATH,
+                                "((//*[@id='posteingangModel']//tbody)[1]//tr)"
+                                f"[{i_page + 1}]//td[@data-rwd='Betreff']/*/button",
+                            )
+                        )
                     )
-                )
-                betreff = downloadbutton.get_attribute("textContent").strip()
-
-                gelesen = row.find_element(By.CSS_SELECTOR, "span.icon")
-                gelesen = gelesen.get_attribute("title") == "gelesen"
-
-                ordnungskriterium = (
-                    row.find_element(By.XPATH, ".//td[@data-rwd='Ordnungskriterium']")
-                    .get_attribute("textContent")
-                    .strip()
-                )
-
-                profil = (
-                    row.find_element(By.XPATH, ".//td[@data-rwd='Profil']")
-                    .get_attribute("textContent")
-                    .strip()
-                )
-
-                absender = (
-                    row.find_element(By.XPATH, ".//td[@data-rwd='Absender']")
-                    .get_attribute("textContent")
-                    .strip()
-                )
-
-                datum = (
-                    row.find_element(By.XPATH, ".//td[@data-rwd='Datum']")
-                    .get_attribute("textContent")
-                    .strip()
-                )
-                datum = re.sub(r"[\n\r\t]+", " ", datum)
+                    # read the table again
+                    continue
+                datum = re.sub(r"[\n\r\t]+", " ", row["datum"])
 
                 yield docdl.Document(
-                    download_element=downloadbutton,
+                    download_element=row["downloadbutton"],
                     attributes={
-                        "betreff": betreff,
-                        "ordnungskriterium": ordnungskriterium,
-                        "profil": profil,
-                        "absender": absender,
+                        "betreff": row["betreff"],
+                        "ordnungskriterium": row["ordnungskriterium"],
+                        "profil": row["profil"],
+                        "absender": row["absender"],
                         "date": docdl.util.parse_date(datum),
-                        "unread": not gelesen,
+                        "unread": row["gelesen"] != "gelesen",
                         "id": i,
                     },
                 )
@@ -146,7 +139,7 @@ class Elster(docdl.SeleniumWebPortal):
         # click to open download dialog
         document.download_element.click()
         # wait for "save as PDF" button
-        savebutton = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        savebutton = self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//button[@id='alsPDFSpeichern']")
             )
@@ -154,7 +147,7 @@ class Elster(docdl.SeleniumWebPortal):
         # click savebutton
         savebutton.click()
         # wait for password dialog
-        password = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        password = self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//input[@id='passwortEingeben']")
             )
@@ -2,10 +2,9 @@
 
 import click
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
@@ -25,7 +24,7 @@ class Handyvertrag(docdl.SeleniumWebPortal):
             By.XPATH, "//input[@id='UserLoginType_alias']"
         )
         # wait for entry field
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(EC.visibility_of(username))
+        self.wait_until(EC.visibility_of(username))
         # send username
         username.send_keys(self.login_id)
         # save current URL
@@ -35,7 +34,7 @@ class Handyvertrag(docdl.SeleniumWebPortal):
             By.XPATH, "//input[@id='UserLoginType_password']"
         )
         # wait for entry field
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(EC.visibility_of(password))
+        self.wait_until(EC.visibility_of(password))
         # send password
         password.send_keys(self.password)
         # submit form
@@ -43,7 +42,7 @@ class Handyvertrag(docdl.SeleniumWebPortal):
         # wait for page to load
         current_url = self.wait_for_urlchange(current_url)
         # wait for either login success, failure or "accept" button
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.presence_of_element_located(
                 (
                     By.XPATH,
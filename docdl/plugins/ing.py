@@ -2,11 +2,11 @@
 
 import itertools
 import click
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
@@ -18,6 +18,9 @@ class ING(docdl.SeleniumWebPortal):
     URL_POSTBOX = "https://banking.ing.de/app/obligo/postbox"
     URL_TRANSACTIONS = "https://banking.ing.de/app/obligo/umsatzanzeige"
 
+    # photoTAN QR-code must load even if images are blocked
+    ALLOW_URLS = ["https://banking.ing.de/*"]
+
     def __init__(self, login_id, password, useragent=None, arguments=None):
         # don't use headless user agent to avoid ing.de mistaking us for a bot
         super().__init__(
@@ -28,11 +31,32 @@ class ING(docdl.SeleniumWebPortal):
             "Gecko/20100101 Firefox/91.0",
         )
 
+    def is_logged_in(self):
+        # postbox redirects to login page without valid session
+        self.webdriver.get(self.URL_POSTBOX)
+        try:
+            self.wait_until(
+                EC.presence_of_element_located(
+                    (
+                        By.XPATH,
+                        "//button[@class='session-button__logout-button'] | "
+                        "//input[contains(@name, 'zugangskennung')]",
+                    )
+                )
+            )
+        except TimeoutException:
+            return False
+        return bool(
+            self.webdriver.find_elements(
+                By.XPATH, "//button[@class='session-button__logout-button']"
+            )
+        )
+
     def login(self):
         # load login page
         self.webdriver.get(self.URL_LOGIN)
         # wait for cookie accept button
-        dialog = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        dialog = self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, ".//*[@data-tag-name='ing-cc-dialog-level0']")
             )
@@ -72,12 +96,16 @@ class ING(docdl.SeleniumWebPortal):
 
         # wait for logout button (success) or tan input (failure) or
         # some ad modal (success)
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
-            lambda d: d.find_elements(
-                By.XPATH, "//button[@class='session-button__logout-button']"
+        self.wait_until(
+            EC.any_of(
+                EC.presence_of_element_located(
+                    (By.XPATH, "//button[@class='session-button__logout-button']")
+                ),
+                EC.presence_of_element_located((By.CSS_SELECTOR, "input.input-field")),
+                EC.presence_of_element_located(
+                    (By.CSS_SELECTOR, "section.insight-modal")
+                ),
             )
-            or d.find_elements(By.CSS_SELECTOR, "input.input-field")
-            or d.find_elements(By.CSS_SELECTOR, "section.insight-modal")
         )
         # login successful ?
         return self.webdriver.find_elements(
@@ -100,7 +128,7 @@ class ING(docdl.SeleniumWebPortal):
         """scrape transaction csv as document"""
         self.webdriver.get(self.URL_TRANSACTIONS)
         # open filter menu
-        filterbutton = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        filterbutton = self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//button[contains(@class, 'filters')]")
             )
@@ -120,14 +148,14 @@ class ING(docdl.SeleniumWebPortal):
         applybutton.click()
         self.scroll_to_bottom()
         # wait for export button
-        exportbutton = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        exportbutton = self.wait_until(
             EC.presence_of_element_located(
                 (By.XPATH, "//a[contains(text(),'Exportieren')]")
             )
         )
         exportbutton.click()
         # wait for CSV radio button
-        csvspan = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        csvspan = self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//span[contains(text(),'CSV')]")
             )
@@ -151,36 +179,31 @@ class ING(docdl.SeleniumWebPortal):
         # open postbox
         self.webdriver.get(self.URL_POSTBOX)
         # wait for table
-        table = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        table = self.wait_until(
             EC.visibility_of_element_located((By.CSS_SELECTOR, "div.ibbr-table"))
         )
+        # the spans of the first cell contain our document data
+        cell = "(.//span[contains(@class,'ibbr-table-cell')])[1]"
         # iterate rows
-        for row in table.find_elements(By.CSS_SELECTOR, "div.ibbr-table-row"):
-            # the next spans contain our document data
-            cell = row.find_element(
-                By.XPATH, ".//span[contains(@class,'ibbr-table-cell')]"
-            )
-            # read status
-            unread = "unread" in cell.get_attribute("class")
-            # get fields inside cell
-            spans = cell.find_elements(By.XPATH, ".//span")
-            # date
-            date = spans[0].get_attribute("textContent").strip()
-            # category
-            category = spans[2].get_attribute("textContent").strip()
-            # subject
-            subject = spans[3].get_attribute("textContent").strip()
-            # download button
-            download = row.find_element(By.XPATH, ".//a[contains(text(),'Download')]")
-            url = download.get_attribute("href")
+        for row in self.extract_table(
+            "div.ibbr-table-row",
+            {
+                "classes": (cell, "className"),
+                "date": f"({cell}//span)[1]",
+                "category": f"({cell}//span)[3]",
+                "subject": f"({cell}//span)[4]",
+                "url": (".//a[contains(text(),'Download')]", "href"),
+            },
+            root=table,
+        ):
             # create document
             yield docdl.Document(
-                url=url,
+                url=row["url"],
                 attributes={
-                    "date": docdl.util.parse_date(date),
-                    "category": category,
-                    "subject": subject,
-                    "unread": unread,
+                    "date": docdl.util.parse_date(row["date"]),
+                    "category": row["category"],
+                    "subject": row["subject"],
+                    "unread": "unread" in row["classes"],
                 },
             )
 
@@ -1,12 +1,14 @@
 """download documents from o2online.de"""
 
+import concurrent.futures
 import itertools
 import click
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
@@ -30,7 +32,7 @@ class O2(docdl.SeleniumWebPortal):
         # find entry field
         username = self.webdriver.find_element(By.XPATH, "//input[@name='IDToken1']")
         # wait for entry field
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(EC.visibility_of(username))
+        self.wait_until(EC.visibility_of(username))
         # send username
         username.send_keys(self.login_id)
         # save current URL
@@ -38,7 +40,7 @@ class O2(docdl.SeleniumWebPortal):
         # submit form
         username.submit()
         # wait for either password prompt or failure message
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.presence_of_element_located(
                 (
                     By.XPATH,
@@ -52,7 +54,7 @@ class O2(docdl.SeleniumWebPortal):
             By.XPATH, "//input[contains(@type, 'password')]"
         )
         # wait for entry field
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(EC.visibility_of(password))
+        self.wait_until(EC.visibility_of(password))
         # send password
         password.send_keys(self.password)
         # submit form
@@ -60,7 +62,7 @@ class O2(docdl.SeleniumWebPortal):
         # wait for page to load
         current_url = self.wait_for_urlchange(current_url)
         # wait for cookie-banner container
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.presence_of_element_located(
                 (
                     By.XPATH,
@@ -76,9 +78,9 @@ class O2(docdl.SeleniumWebPortal):
             # get inside DOM element so we can use XPATH
             container = container.shadow_root.find_element(By.CSS_SELECTOR, "section")
 
-            # wait for cookie banner
+            # wait for cookie banner (inside shadow DOM, so poll it)
             WebDriverWait(container, self.TIMEOUT).until(
-                EC.visibility_of_element_located(
+                expected_conditions.visibility_of_element_located(
                     (By.XPATH, ".//button[contains(text(), 'Verweigern')]")
                 )
             )
@@ -101,25 +103,79 @@ class O2(docdl.SeleniumWebPortal):
         )
 
     def logout(self):
+        # browser was released after login
+        if not self.webdriver:
+            self.session.get(self.URL_LOGOUT)
+            return
         self.webdriver.get(self.URL_LOGOUT)
 
     def documents(self):
         """fetch list of documents"""
+        responses = self._billing_api()
+        # the billing api needs the cookies of the invoice page
+        if not all(map(self._is_json, responses)):
+            # save current URL
+            current_url = self.webdriver.current_url
+            self.webdriver.get(self.URL_INVOICES)
+            # wait for page to load
+            self.wait_for_urlchange(current_url)
+            responses = self._billing_api()
+        invoiceinfo, value_added, overview = map(self._json, responses)
+        # everything else is done by requests
+        self.release_webdriver()
         for i, document in enumerate(
-            itertools.chain(self.invoices(), self.invoice_overview())
+            itertools.chain(
+                self.invoices(invoiceinfo, value_added),
+                self.invoice_overview(overview),
+            )
         ):
             # set an id
             document.attributes["id"] = i
             # return document
             yield document
 
-    def invoice_overview(self):
-        """fetch invoice overview"""
+    def _billing_api(self):
+        """
+        fetch invoice info, value added invoices and invoice overview
+        concurrently
+
+        :result: tuple of requests.Response
+        """
         # copy cookies to request session
         self.copy_to_requests_session()
-        req = self.session.get(self.URL_INVOICE_OVERVIEW)
-        assert req.status_code == 200
-        invoiceoverview = req.json()
+        with concurrent.futures.ThreadPoolExecutor(3) as executor:
+            return tuple(
+                executor.map(
+                    self.session.get,
+                    (
+                        self.URL_INVOICE_INFO,
+                        self.URL_VALUE_ADDED_INVOICE,
+                        self.URL_INVOICE_OVERVIEW,
+                    ),
+                )
+            )
+
+    @staticmethod
+    def _is_json(response):
+        """:result: True if response is an answer of the api"""
+        return response.ok and "json" in response.headers.get("content-type", "")
+
+    @staticmethod
+    def _json(response):
+        """:result: decoded json of a billing api response"""
+        # not logged in (or sent to the login page)
+        if response.status_code in (401, 403) or (
+            response.ok and "json" not in response.headers.get("content-type", "")
+        ):
+            raise docdl.AuthenticationError(f'"{response.url}" needs a valid session')
+        if not response.ok:
+            raise docdl.DownloadError(
+                f'"{response.url}" status code: {response.status_code}'
+            )
+        return response.json()
+
+    def invoice_overview(self, invoiceoverview):
+        """parse invoice overview json"""
         years = invoiceoverview["invoices"].keys()
         for year in years:
             yield docdl.Document(
@@ -133,24 +189,12 @@ class O2(docdl.SeleniumWebPortal):
                 },
             )
 
-    def invoices(self):
-        """fetch list of invoices"""
-        # save current URL
-        current_url = self.webdriver.current_url
-        # fetch normal invoices
-        self.webdriver.get(self.URL_INVOICES)
-        # wait for page to load
-        current_url = self.wait_for_urlchange(current_url)
-        # copy cookies to request session
-        self.copy_to_requests_session()
-        # load invoice info json
-        req = self.session.get(self.URL_INVOICE_INFO)
-        for document in self.parse_invoices_json(req.json()):
+    def invoices(self, invoiceinfo, value_added):
+        """parse invoice info and value added invoices json"""
+        for document in self.parse_invoices_json(invoiceinfo):
             document.attributes["category"] = "invoice"
             yield document
-        # fetch value added invoices
-        req = self.session.get(self.URL_VALUE_ADDED_INVOICE)
-        for document in self.parse_invoices_json(req.json()):
+        for document in self.parse_invoices_json(value_added):
             document.attributes["category"] = "value_added_invoice"
             yield document
 
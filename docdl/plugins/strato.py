@@ -3,10 +3,9 @@
 import re
 import click
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
@@ -19,17 +18,17 @@ class Strato(docdl.SeleniumWebPortal):
         # load homepage
         self.webdriver.get("https://www.strato.de/apps/CustomerService")
         # accept cookies
-        accept_cookies = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        accept_cookies = self.wait_until(
             EC.visibility_of_element_located((By.XPATH, "//button[@id='consentAgree']"))
         )
         accept_cookies.click()
         # find fields
-        username = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        username = self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//input[@autocomplete='username']")
             )
         )
-        password = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        password = self.wait_until(
             EC.presence_of_element_located((By.CSS_SELECTOR, "input#jss_ksb_password"))
         )
         # enter credentials
@@ -37,12 +36,12 @@ class Strato(docdl.SeleniumWebPortal):
         password.send_keys(self.password)
 
         # submit form
-        submit = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        submit = self.wait_until(
             EC.presence_of_element_located((By.XPATH, "//input[@type='submit']"))
         )
         submit.click()
         # wait for either login success or failure
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.presence_of_element_located(
                 (
                     By.XPATH,
@@ -55,7 +54,7 @@ class Strato(docdl.SeleniumWebPortal):
         return re.match(r".*(Ü|ü)bersicht.*", self.webdriver.title)
 
     def logout(self):
-        logoutbutton = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        logoutbutton = self.wait_until(
             EC.visibility_of_element_located(
                 (By.XPATH, "//*[contains(text(), 'Abmelden')]")
             )
@@ -66,7 +65,7 @@ class Strato(docdl.SeleniumWebPortal):
         # count all documents
         i = 0
         # load invoices overview
-        invoices_link = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        invoices_link = self.wait_until(
             EC.invisibility_of_element_located(
                 (By.XPATH, "//a[contains(@href,'OnlineInvoice')]")
             )
@@ -76,53 +75,49 @@ class Strato(docdl.SeleniumWebPortal):
         # iterate all pages
         while True:
             # wait for table of invoices
-            invoice_table = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+            invoice_table = self.wait_until(
                 EC.visibility_of_element_located(
                     (By.XPATH, "//table[@id='invoice_table']")
                 )
             )
-            # iterate all invoices
-            for invoice in invoice_table.find_elements(By.XPATH, ".//tr"):
+            # iterate all invoices (skip header)
+            for invoice in self.extract_table(
+                ".//tr[td]",
+                {
+                    "classes": ("", "className"),
+                    "date": (":scope > td:nth-of-type(2)", "data-sortvalue"),
+                    "status": ":scope > td:nth-of-type(3)",
+                    "link": (
+                        ":scope > td:nth-of-type(4) a[href*='action=pdf']",
+                        "element",
+                    ),
+                    "title": ":scope > td:nth-of-type(4) a[href*='action=pdf']",
+                    "amount": ":scope > td:nth-of-type(5) span.jss_price",
+                },
+                root=invoice_table,
+            ):
                 # hidden row ?
-                if "hidden" in invoice.get_attribute("class"):
+                if "hidden" in invoice["classes"]:
                     # skip
                     continue
-                columns = invoice.find_elements(By.CSS_SELECTOR, "td")
-                # got header?
-                if len(columns) == 0:
-                    # skip
-                    continue
-                # get attributes
-                date = columns[1].get_attribute("data-sortvalue").strip()
-                status = columns[2].get_attribute("textContent").lower().strip()
-                invoice_link = columns[3].find_element(
-                    By.XPATH, ".//a[contains(@href,'action=pdf')]"
-                )
-                title = invoice_link.get_attribute("textContent").strip()
-                amount = (
-                    columns[4]
-                    .find_element(By.XPATH, ".//span[@class='jss_price']")
-                    .get_attribute("textContent")
-                    .strip()
-                )
 
                 # create document
                 yield docdl.Document(
-                    download_element=invoice_link,
+                    download_element=invoice["link"],
                     attributes={
-                        "date": docdl.util.parse_date(date),
+                        "date": docdl.util.parse_date(invoice["date"].strip()),
                         "doctype": "invoice",
-                        "status": status,
-                        "amount": amount,
+                        "status": invoice["status"].lower(),
+                        "amount": invoice["amount"],
                         "id": i,
-                        "filename": f"strato-{title}.pdf",
+                        "filename": f"strato-{invoice['title']}.pdf",
                     },
                 )
                 # increment counter
                 i += 1
 
             # load next page
-            nextbutton = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+            nextbutton = self.wait_until(
                 EC.visibility_of_element_located(
                     (By.XPATH, "//a[contains(@class,'next')]")
                 )
@@ -2,10 +2,9 @@
 
 import click
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 
 import docdl
+from docdl.util import conditions as EC
 import docdl.util
 
 
@@ -25,17 +24,17 @@ class Vodafone(docdl.SeleniumWebPortal):
         # load login page
         self.webdriver.get(self.URL_LOGIN)
         # fill out login form when it appears
-        username = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        username = self.wait_until(
             EC.element_to_be_clickable((By.XPATH, "//input[@id='txtUsername']"))
         )
-        password = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        password = self.wait_until(
             EC.element_to_be_clickable((By.XPATH, "//input[@id='txtPassword']"))
         )
         username.send_keys(self.login_id)
         password.send_keys(self.password)
         password.submit()
         # wait for page element indicating success or error
-        WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        self.wait_until(
             EC.any_of(
                 EC.presence_of_element_located((By.CSS_SELECTOR, ".contract-info")),
                 EC.element_to_be_clickable((By.XPATH, "//input[@id='txtUsername']")),
@@ -62,45 +61,36 @@ class Vodafone(docdl.SeleniumWebPortal):
         # go to documents site
         self.webdriver.get(self.URL_MY_DOCUMENTS)
         # wait for documents
-        documents = WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        documents = self.wait_until(
             EC.element_to_be_clickable(
                 (By.XPATH, "//ul[contains(@class, 'documents-inbox-container')]")
             )
         )
         # iterate all pages
-        while next_button := WebDriverWait(self.webdriver, self.TIMEOUT).until(
+        while next_button := self.wait_until(
             EC.element_to_be_clickable(
                 (By.XPATH, "//div[@id='pagination']/ol/li[3]/a[1]")
             )
         ):
             # iterate all document elements
-            for element in documents.find_elements(By.CSS_SELECTOR, "li"):
-                # get date
-                date = (
-                    element.find_element(
-                        By.XPATH, ".//*[@automation-id='documentsInboxes_date_tv']"
-                    )
-                    .get_attribute("textContent")
-                    .strip()
-                )
-                # get title
-                title = (
-                    element.find_element(
-                        By.XPATH, ".//*[@automation-id='documentsInboxes_type_tv']"
-                    )
-                    .get_attribute("textContent")
-                    .strip()
-                )
-                # get download link
-                dl_button = element.find_element(
-                    By.XPATH, ".//*[@automation-id='documentsInboxes_download_btn']"
-                )
+            for element in self.extract_table(
+                "li",
+                {
+                    "date": ".//*[@automation-id='documentsInboxes_date_tv']",
+                    "title": ".//*[@automation-id='documentsInboxes_type_tv']",
+                    "dl_button": (
+                        ".//*[@automation-id='documentsInboxes_download_btn']",
+                        "element",
+                    ),
+                },
+                root=documents,
+            ):
                 # generate document
                 yield docdl.Document(
-                    download_element=dl_button,
+                    download_element=element["dl_button"],
                     attributes={
-                        "title": title,
-                        "date": docdl.util.parse_date(date),
+                        "title": element["title"],
+                        "date": docdl.util.parse_date(element["date"]),
                         "category": "invoice",
                     },
                 )
@@ -0,0 +1,67 @@
+"""download documents in the background"""
+
+import collections
+import concurrent.futures
+
+
+class DownloadPool:
+    """
+    download documents using a bounded pool of worker threads while
+    keeping them in the order they were submitted
+    """
+
+    def __init__(self, portal, jobs=1):
+        """
+        :param portal: WebPortal instance to download from
+        :param jobs: maximum amount of concurrent downloads
+        """
+        self.portal = portal
+        self.jobs = max(jobs, 1)
+        self.executor = None
+        # (document, future) tuples in order of submission
+        self.pending = collections.deque()
+
+    def __enter__(self):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.jobs)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        # don't wait for pending downloads if something went wrong
+        if exc_type is not None:
+            for _, future in self.pending:
+                if future:
+                    future.cancel()
+        self.executor.shutdown(wait=exc_type is None)
+
+    def submit(self, document):
+        """start downloading a document"""
+        future = self._submit(document)
+        # document can't be downloaded by a worker?
+        if future is None:
+            self.portal.download(document)
+        self.pending.append((document, future))
+
+    def _submit(self, document):
+        """
+        :result: concurrent.futures.Future of background download or
+                 None if document needs to be downloaded in the foreground
+        """
+        return self.portal.download_in_background(self.executor, document)
+
+    def finished(self, wait=False):
+        """
+        generator that yields all documents that finished downloading
+        in order of submission
+
+        :param wait: wait for all pending downloads to finish
+        """
+        while self.pending:
+            document, future = self.pending[0]
+            if future is not None:
+                # stop at first unfinished download to keep the order
+                if not wait and not future.done():
+                    break
+                # raise exceptions of worker
+                future.result()
+            self.pending.popleft()
+            yield document
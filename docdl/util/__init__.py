@@ -2,11 +2,16 @@
 
 import platform
 import shutil
+import string
 import sys
 import os
+import click
 
 from .dateparser import parse as parse_date  # noqa: F401 (import as shortcut)
 
+# attributes that are formatted as dates in path templates
+DATE_FIELDS = ("date",)
+
 
 def parse_decimal(decimal):
     """massage string with decimal number"""
@@ -15,6 +20,51 @@ def parse_decimal(decimal):
     return decimal
 
 
+# pylint: disable=R0903
+class _MissingField:
+    """placeholder for fields missing in a path template"""
+
+    def __format__(self, format_spec):
+        return "unknown"
+
+
+class _PathFields(dict):
+    """fields of a path template"""
+
+    def __missing__(self, key):
+        return _MissingField()
+
+
+def format_path(template, **fields):
+    """
+    fill in a path template like "{plugin}/{date:%Y}/{filename}".
+    Path separators in string fields are replaced, missing fields
+    become "unknown".
+    """
+    fields = {
+        name: parse_date(value) if name in DATE_FIELDS else value
+        for name, value in fields.items()
+    }
+    fields = {
+        name: value.replace(os.sep, "-") if isinstance(value, str) else value
+        for name, value in fields.items()
+    }
+    try:
+        return os.path.normpath(template.format_map(_PathFields(fields)))
+    # format spec doesn't fit the type of an attribute
+    except (TypeError, ValueError) as exc:
+        for _, name, format_spec, _ in string.Formatter().parse(template):
+            if name in fields and format_spec:
+                try:
+                    format(fields[name], format_spec)
+                except (TypeError, ValueError):
+                    raise click.UsageError(
+                        f'path template can\'t format "{name}" ({fields[name]!r}) '
+                        f'with "{format_spec}"'
+                    ) from exc
+        raise
+
+
 def show_image(filename, name="image"):
     """attempt to show image"""
     # always print image filename
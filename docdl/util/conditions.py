@@ -0,0 +1,215 @@
+"""
+conditions to wait for inside the browser (named like the ones of
+selenium.webdriver.support.expected_conditions).
+
+Instead of polling the webdriver, the page checks the condition whenever
+its DOM changes and answers a single execute_async_script() call.
+"""
+
+import json
+import time
+from selenium.common.exceptions import (
+    JavascriptException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+from selenium.webdriver.common.by import By
+
+# seconds a single script may wait (below the default script timeout)
+SLICE = 10
+
+# messages of script errors caused by navigating away while waiting
+NAVIGATION_ERRORS = (
+    "document unloaded",
+    "document was unloaded",
+    "execution context was destroyed",
+    "cannot find context with specified id",
+)
+
+# wait for condition and call back with {"value": result} or null
+SCRIPT = """
+const [condition, timeout, done] = arguments;
+
+function find(locator) {
+    const [using, value] = locator;
+    if (using === "xpath") {
+        return document.evaluate(
+            value, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+    }
+    return document.querySelector(value);
+}
+
+function visible(element) {
+    return element.isConnected
+        && (element.offsetWidth > 0 || element.offsetHeight > 0
+            || element.getClientRects().length > 0)
+        && getComputedStyle(element).visibility !== "hidden";
+}
+
+function check(condition) {
+    const element = condition.element || (condition.locator && find(condition.locator));
+    switch (condition.type) {
+        case "presence":
+            return element;
+        case "visibility":
+            return element && visible(element) ? element : null;
+        case "invisibility":
+            return !element || !visible(element);
+        case "clickable":
+            return element && visible(element) && !element.disabled ? element : null;
+        case "staleness":
+            return !element.isConnected;
+        case "url_changes":
+            return location.href !== condition.url;
+        case "url_contains":
+            return location.href.includes(condition.text);
+        case "title_contains":
+            return document.title.includes(condition.text);
+        case "any_of":
+            for (const alternative of condition.conditions) {
+                const result = check(alternative);
+                if (result) {
+                    return result;
+                }
+            }
+            return null;
+    }
+    throw new Error(`unknown condition: ${condition.type}`);
+}
+
+let finished = false;
+function finish(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    done(result);
+}
+
+function poll() {
+    const result = check(condition);
+    if (result) {
+        finish({value: result});
+    }
+}
+
+const observer = new MutationObserver(poll);
+observer.observe(document, {
+    subtree: true, childList: true, attributes: true, characterData: true
+});
+// layout, style and url changes don't always mutate the DOM
+const interval = setInterval(poll, 50);
+const timer = setTimeout(() => finish(null), timeout);
+poll();
+"""
+
+
+def _locator(locator):
+    """:result: (by, value) tuple as xpath or css selector"""
+    by, value = locator
+    if by == By.ID:
+        return [By.CSS_SELECTOR, f"[id={json.dumps(value)}]"]
+    if by == By.NAME:
+        return [By.CSS_SELECTOR, f"[name={json.dumps(value)}]"]
+    if by == By.CLASS_NAME:
+        return [By.CSS_SELECTOR, f".{value}"]
+    if by == By.TAG_NAME:
+        return [By.CSS_SELECTOR, value]
+    if by in (By.XPATH, By.CSS_SELECTOR):
+        return [by, value]
+    raise ValueError(f"unsupported locator: {by}")
+
+
+def presence_of_element_located(locator):
+    """element is in the DOM (result: the element)"""
+    return {"type": "presence", "locator": _locator(locator)}
+
+
+def visibility_of_element_located(locator):
+    """element is displayed (result: the element)"""
+    return {"type": "visibility", "locator": _locator(locator)}
+
+
+def visibility_of(element):
+    """WebElement is displayed (result: the element)"""
+    return {"type": "visibility", "element": element}
+
+
+def invisibility_of_element_located(locator):
+    """element is hidden or not in the DOM"""
+    return {"type": "invisibility", "locator": _locator(locator)}
+
+
+def element_to_be_clickable(mark):
+    """element (locator or WebElement) is displayed and enabled (result: the element)"""
+    if isinstance(mark, tuple):
+        return {"type": "clickable", "locator": _locator(mark)}
+    return {"type": "clickable", "element": mark}
+
+
+def staleness_of(element):
+    """WebElement was removed from the DOM"""
+    return {"type": "staleness", "element": element}
+
+
+def url_changes(url):
+    """current url isn't url anymore"""
+    return {"type": "url_changes", "url": url}
+
+
+def url_contains(text):
+    """current url contains text"""
+    return {"type": "url_contains", "text": text}
+
+
+def title_contains(text):
+    """page title contains text"""
+    return {"type": "title_contains", "text": text}
+
+
+def any_of(*conditions):
+    """one of the conditions is met (result: its result)"""
+    return {"type": "any_of", "conditions": list(conditions)}
+
+
+def _waits_for_staleness(condition):
+    """:result: True if condition is met by elements becoming stale"""
+    if condition["type"] == "any_of":
+        return any(_waits_for_staleness(c) for c in condition["conditions"])
+    return condition["type"] == "staleness"
+
+
+def wait(webdriver, condition, timeout):
+    """
+    block until condition is met
+
+    :param webdriver: selenium webdriver
+    :param condition: condition created by a function of this module
+    :param timeout: seconds to wait
+    :result: result of the condition
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = max(deadline - time.monotonic(), 0)
+        try:
+            result = webdriver.execute_async_script(
+                SCRIPT, condition, min(remaining, SLICE) * 1000
+            )
+        except JavascriptException as exc:
+            # page was unloaded while waiting, check the next one
+            if not any(error in str(exc).lower() for error in NAVIGATION_ERRORS):
+                raise
+            result = None
+        # element of the condition is gone
+        except StaleElementReferenceException:
+            if not _waits_for_staleness(condition):
+                raise
+            return True
+        if result:
+            return result["value"]
+        if time.monotonic() >= deadline:
+            raise TimeoutException(f"condition {condition['type']} not met")
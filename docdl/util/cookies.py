@@ -0,0 +1,162 @@
+"""keep cookies of a selenium webdriver and a requests session in sync"""
+
+import requests.cookies
+from selenium.common.exceptions import WebDriverException
+
+
+def _key(cookie):
+    """:result: identity of a cookie dict"""
+    return (cookie["domain"], cookie["path"], cookie["name"])
+
+
+def _from_devtools(cookie):
+    """:result: cookie dict of a devtools Network.Cookie"""
+    result = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie["domain"],
+        "path": cookie["path"],
+        "secure": cookie["secure"],
+        "httpOnly": cookie["httpOnly"],
+    }
+    if not cookie.get("session") and cookie.get("expires", -1) >= 0:
+        result["expiry"] = int(cookie["expires"])
+    if "sameSite" in cookie:
+        result["sameSite"] = cookie["sameSite"]
+    return result
+
+
+def _to_devtools(cookie):
+    """:result: devtools Network.CookieParam of a cookie dict"""
+    result = {
+        key: cookie[key]
+        for key in ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite")
+        if key in cookie
+    }
+    if "expiry" in cookie:
+        result["expires"] = cookie["expiry"]
+    return result
+
+
+def _nonstandard_attr(cookie, name):
+    """:result: (found, value) of attribute (servers don't agree on case)"""
+    for spelling in (name, name.lower()):
+        if cookie.has_nonstandard_attr(spelling):
+            return True, cookie.get_nonstandard_attr(spelling)
+    return False, None
+
+
+def _from_jar(cookie):
+    """:result: cookie dict of a http.cookiejar.Cookie"""
+    result = {
+        "name": cookie.name,
+        "value": cookie.value,
+        "domain": cookie.domain,
+        "path": cookie.path,
+        "secure": cookie.secure,
+        "httpOnly": _nonstandard_attr(cookie, "HttpOnly")[0],
+    }
+    if cookie.expires is not None:
+        result["expiry"] = cookie.expires
+    if samesite := _nonstandard_attr(cookie, "SameSite")[1]:
+        result["sameSite"] = samesite.capitalize()
+    return result
+
+
+def _to_jar(cookie):
+    """:result: http.cookiejar.Cookie of a cookie dict"""
+    rest = {}
+    if cookie.get("httpOnly"):
+        rest["HttpOnly"] = None
+    if cookie.get("sameSite"):
+        rest["SameSite"] = cookie["sameSite"]
+    return requests.cookies.create_cookie(
+        cookie["name"],
+        cookie["value"],
+        domain=cookie.get("domain", ""),
+        path=cookie.get("path", "/"),
+        secure=cookie.get("secure", False),
+        expires=cookie.get("expiry"),
+        rest=rest,
+    )
+
+
+class CookieBridge:
+    """
+    copy cookies (with domain, path, expiry and flags) between browser
+    and requests session. Only cookies that changed since the last
+    copy are transferred.
+    """
+
+    def __init__(self, webdriver, session):
+        """
+        :param webdriver: selenium webdriver
+        :param session: requests.Session
+        """
+        self.webdriver = webdriver
+        self.session = session
+        # cookies both sides agreed on by the last copy
+        self.synced = {}
+        self.useragent = None
+
+    def _browser_cookies(self):
+        """:result: list of cookie dicts of the browser"""
+        # chromium can tell the cookies of all domains at once
+        if hasattr(self.webdriver, "execute_cdp_cmd"):
+            try:
+                cookies = self.webdriver.execute_cdp_cmd("Network.getAllCookies", {})
+                return [_from_devtools(cookie) for cookie in cookies["cookies"]]
+            except WebDriverException:
+                pass
+        # cookies of the current page
+        return self.webdriver.get_cookies()
+
+    def to_session(self):
+        """copy browser cookies that changed to the requests session"""
+        cookies = {_key(cookie): cookie for cookie in self._browser_cookies()}
+        for key, cookie in cookies.items():
+            if self.synced.get(key) != cookie:
+                self.session.cookies.set_cookie(_to_jar(cookie))
+                self.synced[key] = cookie
+        # cookies the browser deleted
+        for key in set(self.synced) - set(cookies):
+            del self.synced[key]
+            try:
+                self.session.cookies.clear(*key)
+            except KeyError:
+                pass
+        # the user agent doesn't change during a session
+        if not self.useragent:
+            self.useragent = self.webdriver.execute_script("return navigator.userAgent;")
+        self.session.headers["User-Agent"] = self.useragent
+
+    def from_session(self):
+        """copy session cookies that changed to the browser"""
+        changed = []
+        for cookie in list(self.session.cookies):
+            cookie = _from_jar(cookie)
+            synced = self.synced.get(_key(cookie))
+            if not synced or synced["value"] != cookie["value"]:
+                changed += [cookie]
+        # nothing to do
+        if not changed:
+            return
+        # chromium can set the cookies of all domains at once
+        if hasattr(self.webdriver, "execute_cdp_cmd"):
+            try:
+                self.webdriver.execute_cdp_cmd(
+                    "Network.setCookies",
+                    {"cookies": [_to_devtools(cookie) for cookie in changed]},
+                )
+                for cookie in changed:
+                    self.synced[_key(cookie)] = cookie
+                return
+            except WebDriverException:
+                pass
+        for cookie in changed:
+            try:
+                self.webdriver.add_cookie(cookie)
+                self.synced[_key(cookie)] = cookie
+            # browsers only accept cookies for the domain of the current page
+            except WebDriverException:
+                pass
@@ -0,0 +1,293 @@
+"""follow downloads and block requests of chromium browsers via devtools"""
+
+import collections
+import fnmatch
+import os
+import threading
+import time
+import trio
+
+
+# resource types that can be blocked (lowercase name: devtools ResourceType)
+RESOURCE_TYPES = {
+    "image": "Image",
+    "media": "Media",
+    "font": "Font",
+    "stylesheet": "Stylesheet",
+    "script": "Script",
+    "ping": "Ping",
+    "other": "Other",
+}
+
+
+class ChromeDownload:
+    """a download announced by the browser"""
+
+    # pylint: disable=R0902
+
+    def __init__(self, downloads):
+        """
+        :param downloads: ChromeDownloads this download belongs to
+        """
+        self.downloads = downloads
+        self.directory = downloads.directory
+        # global unique identifier of the download (its file name on disk)
+        self.guid = None
+        # filename suggested by the browser
+        self.filename = None
+        # path of downloaded file
+        self.path = None
+        # progress
+        self.received = 0
+        self.total = 0
+        self.state = None
+        # time of downloadWillBegin and last downloadProgress event
+        self.begin = self.end = None
+        # set when the browser announced the download
+        self.started = threading.Event()
+        # set on every progress event
+        self.activity = threading.Event()
+        # set when the download completed or was canceled
+        self.completed = threading.Event()
+
+    @property
+    def seconds(self):
+        """:result: duration of download"""
+        return self.end - self.begin if self.begin else 0.0
+
+    def wait(self, timeout, deadline=None):
+        """
+        block until the browser completed the download
+
+        :param timeout: seconds without any progress until giving up
+        :param deadline: seconds the whole download may take (default: no limit)
+        :result: path of downloaded file or None if download was canceled
+        """
+        now = progress = time.monotonic()
+        end = now + deadline if deadline else float("inf")
+        while not self.completed.wait(min(progress + timeout, end) - now):
+            now = time.monotonic()
+            # download trickles in too slowly
+            if now >= end:
+                raise TimeoutError(f"download didn't complete within {deadline} seconds")
+            # download still in progress?
+            if not self.activity.is_set():
+                raise TimeoutError(f"download didn't progress for {timeout} seconds")
+            self.activity.clear()
+            progress = now
+        return self.path
+
+    def close(self):
+        """forget download and remove its file if it wasn't moved away"""
+        self.downloads.forget(self)
+        if self.guid and os.path.exists(os.path.join(self.directory, self.guid)):
+            os.remove(os.path.join(self.directory, self.guid))
+
+
+class DevtoolsListener:
+    """thread with a devtools connection to the browser that handles events"""
+
+    def __init__(self, webdriver):
+        """
+        :param webdriver: selenium chromium webdriver
+        """
+        self.webdriver = webdriver
+        # set when the connection was established (or failed)
+        self.ready = threading.Event()
+        self.error = None
+        self.thread = None
+        self.token = None
+        self.cancel_scope = None
+
+    def start(self, timeout):
+        """
+        connect to browser in a background thread
+
+        :param timeout: seconds to wait for the connection
+        """
+        self.thread = threading.Thread(target=trio.run, args=(self._listen,), daemon=True)
+        self.thread.start()
+        if not self.ready.wait(timeout):
+            raise TimeoutError("devtools connection timed out")
+        if self.error:
+            raise self.error
+
+    def stop(self):
+        """disconnect from browser"""
+        if self.thread and self.thread.is_alive():
+            trio.from_thread.run_sync(self.cancel_scope.cancel, trio_token=self.token)
+            self.thread.join()
+
+    async def _listen(self):
+        """handle events until stop()"""
+        self.token = trio.lowlevel.current_trio_token()
+        try:
+            with trio.CancelScope() as self.cancel_scope:
+                async with self.webdriver.bidi_connection() as connection:
+                    await self.handle(connection.session, connection.devtools)
+        # report errors to start()
+        except Exception as exc:  # pylint: disable=W0703
+            self.error = exc
+        finally:
+            self.ready.set()
+
+    async def handle(self, session, devtools):
+        """
+        subscribe to events, set self.ready and handle events
+
+        :param session: devtools session of the current page
+        :param devtools: devtools protocol module of the browser version
+        """
+        raise NotImplementedError(f"{self.__class__} needs a handle() coroutine")
+
+
+class ChromeDownloads(DevtoolsListener):
+    """
+    let the browser save downloads under their GUID in a directory and
+    follow them by Browser.downloadWillBegin and Browser.downloadProgress
+    events
+    """
+
+    def __init__(self, webdriver, directory):
+        """
+        :param webdriver: selenium chromium webdriver
+        :param directory: directory the browser saves downloads to
+        """
+        super().__init__(webdriver)
+        self.directory = directory
+        self.lock = threading.Lock()
+        # downloads of clicks that weren't announced by the browser, yet
+        self.expected = collections.deque()
+        # announced downloads by guid
+        self.downloads = {}
+
+    def expect(self):
+        """
+        :result: ChromeDownload that will be assigned to the next
+                 download started by the browser
+        """
+        download = ChromeDownload(self)
+        with self.lock:
+            self.expected.append(download)
+        return download
+
+    def forget(self, download):
+        """stop following a download"""
+        with self.lock:
+            # the browser never announced the download
+            if download in self.expected:
+                self.expected.remove(download)
+            self.downloads.pop(download.guid, None)
+
+    async def handle(self, session, devtools):
+        # downloads of incognito tabs don't happen in the default
+        # browser context
+        targets = await session.execute(devtools.target.get_targets())
+        context = next(
+            (target.browser_context_id for target in targets if target.type_ == "page"),
+            None,
+        )
+        await session.execute(
+            devtools.browser.set_download_behavior(
+                behavior="allowAndName",
+                browser_context_id=context,
+                download_path=self.directory,
+                events_enabled=True,
+            )
+        )
+        events = session.listen(
+            devtools.browser.DownloadWillBegin,
+            devtools.browser.DownloadProgress,
+            buffer_size=1000,
+        )
+        self.ready.set()
+        async for event in events:
+            if isinstance(event, devtools.browser.DownloadWillBegin):
+                self._begin(event)
+            else:
+                self._progress(event)
+
+    def _begin(self, event):
+        """assign announced download to the oldest click"""
+        with self.lock:
+            # download wasn't started by us
+            if not self.expected:
+                return
+            download = self.expected.popleft()
+            self.downloads[event.guid] = download
+        download.guid = event.guid
+        download.filename = event.suggested_filename
+        download.begin = download.end = time.monotonic()
+        download.started.set()
+
+    def _progress(self, event):
+        """update progress of download"""
+        with self.lock:
+            download = self.downloads.get(event.guid)
+        if not download:
+            return
+        download.received = int(event.received_bytes)
+        download.total = int(event.total_bytes)
+        download.state = event.state
+        download.end = time.monotonic()
+        download.activity.set()
+        if event.state == "inProgress":
+            return
+        if event.state == "completed":
+            download.path = os.path.join(self.directory, event.guid)
+        with self.lock:
+            self.downloads.pop(event.guid, None)
+        download.completed.set()
+
+
+class RequestBlocker(DevtoolsListener):
+    """
+    let the browser pause requests of blocked resource types and urls
+    (Fetch.requestPaused events) and fail them unless they're allowed
+    """
+
+    def __init__(self, webdriver, resources=(), urls=(), allow=()):
+        """
+        :param webdriver: selenium chromium webdriver
+        :param resources: names of RESOURCE_TYPES to block
+        :param urls: url patterns to block (* and ? wildcards)
+        :param allow: url patterns to load although they're blocked
+        """
+        super().__init__(webdriver)
+        self.resources = resources
+        self.urls = urls
+        self.allow = allow
+        # amount of failed requests
+        self.blocked = 0
+
+    def allowed(self, url):
+        """:result: True if url matches an allowed pattern"""
+        return any(fnmatch.fnmatchcase(url, pattern) for pattern in self.allow)
+
+    async def handle(self, session, devtools):
+        # only pause requests that might get blocked
+        patterns = [
+            devtools.fetch.RequestPattern(
+                resource_type=devtools.network.ResourceType(RESOURCE_TYPES[resource]),
+                request_stage=devtools.fetch.RequestStage.REQUEST,
+            )
+            for resource in self.resources
+        ] + [
+            devtools.fetch.RequestPattern(
+                url_pattern=url, request_stage=devtools.fetch.RequestStage.REQUEST
+            )
+            for url in self.urls
+        ]
+        events = session.listen(devtools.fetch.RequestPaused, buffer_size=1000)
+        await session.execute(devtools.fetch.enable(patterns=patterns))
+        self.ready.set()
+        async for event in events:
+            if self.allowed(event.request.url):
+                await session.execute(devtools.fetch.continue_request(event.request_id))
+                continue
+            await session.execute(
+                devtools.fetch.fail_request(
+                    event.request_id, devtools.network.ErrorReason.BLOCKED_BY_CLIENT
+                )
+            )
+            self.blocked += 1
@@ -0,0 +1,195 @@
+"""wait for files downloaded by a browser"""
+
+import fnmatch
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import watchdog.events
+import watchdog.observers
+
+
+# browser downloads of a run go to a hidden directory in the output
+# directory, so they can be moved into place with os.replace()
+DOWNLOAD_DIR_PREFIX = ".document-dl-"
+
+
+def _running(pid):
+    """:result: True if process with pid is still running"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def create_download_dir(directory):
+    """
+    create the directory a browser downloads to and remove the ones that
+    runs which were killed left behind
+
+    :param directory: output directory
+    :result: path of download directory
+    """
+    # os.kill() can't check processes on other platforms
+    if os.name == "posix":
+        pattern = re.compile(rf"{re.escape(DOWNLOAD_DIR_PREFIX)}(\d+)-")
+        for entry in os.scandir(directory):
+            match = pattern.match(entry.name)
+            if match and entry.is_dir() and not _running(int(match.group(1))):
+                shutil.rmtree(entry.path, ignore_errors=True)
+    return tempfile.mkdtemp(prefix=f"{DOWNLOAD_DIR_PREFIX}{os.getpid()}-", dir=directory)
+
+
+class DownloadFileHandler(watchdog.events.FileSystemEventHandler):
+    """
+    directory watchdog that waits until a browser completely wrote a
+    newly downloaded file
+    """
+
+    # pylint: disable=R0902
+
+    # temporary files of browsers
+    IGNORE_PATTERNS = (
+        "*.crdownload",
+        "*.part",
+        "*.tmp",
+        ".com.google.Chrome.*",
+    )
+    # seconds without filesystem events until a file is considered
+    # complete if the platform doesn't report closed files
+    SETTLE = 2
+
+    def __init__(self, observer, directory, staging=False):
+        """
+        :param observer: watchdog observer to schedule this handler on
+        :param directory: directory the browser downloads to
+        :param staging: remove directory when the download is closed
+        """
+        super().__init__()
+        # path of downloaded file
+        self.path = None
+        # filename suggested by the browser (the file's name)
+        self.filename = None
+        self.staging = staging
+        # time of first and last filesystem event
+        self.begin = self.end = None
+        self.observer = observer
+        self.watch = observer.schedule(self, directory, recursive=False)
+        # set on the first filesystem event
+        self.started = threading.Event()
+        # set on every filesystem event
+        self.activity = threading.Event()
+        # set when the downloaded file was closed or renamed into place
+        self.completed = threading.Event()
+
+    def ignored(self, path):
+        """:result: True if path is a temporary file"""
+        name = os.path.basename(path)
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.IGNORE_PATTERNS)
+
+    def busy(self):
+        """:result: True if the browser is still writing to a temporary file"""
+        return any(
+            os.path.exists(f"{self.path}{suffix}") for suffix in (".crdownload", ".part")
+        )
+
+    @property
+    def seconds(self):
+        """:result: duration of download"""
+        return self.end - self.begin if self.begin else 0.0
+
+    def on_any_event(self, event):
+        self.end = time.monotonic()
+        if not self.started.is_set():
+            self.begin = self.end
+            self.started.set()
+        self.activity.set()
+
+    def on_created(self, event):
+        if not event.is_directory and not self.ignored(event.src_path):
+            self.path = event.src_path
+
+    def on_moved(self, event):
+        # browsers rename temporary files when the download is complete
+        if not event.is_directory and not self.ignored(event.dest_path):
+            self.path = event.dest_path
+            self.completed.set()
+
+    def on_closed(self, event):
+        # file written directly (firefox creates an empty placeholder
+        # while writing the .part file)
+        if event.src_path == self.path and not self.busy():
+            self.completed.set()
+
+    def wait(self, timeout, deadline=None):
+        """
+        block until a file was downloaded completely
+
+        :param timeout: seconds without any progress until giving up
+        :param deadline: seconds the whole download may take (default: no limit)
+        :result: path of downloaded file
+        """
+        end = time.monotonic() + deadline if deadline else None
+        idle = 0
+        while not self.completed.wait(self.SETTLE):
+            # download trickles in too slowly
+            if end and time.monotonic() >= end:
+                raise TimeoutError(f"download didn't complete within {deadline} seconds")
+            # download still in progress?
+            if self.activity.is_set():
+                self.activity.clear()
+                idle = 0
+                continue
+            # file didn't change for a while
+            if self.path and not self.busy():
+                break
+            idle += self.SETTLE
+            if idle >= timeout:
+                raise TimeoutError(f"download didn't progress for {idle} seconds")
+        return self.path
+
+    def close(self):
+        """stop watching the download directory (and remove it)"""
+        self.observer.unschedule(self.watch)
+        if self.staging:
+            shutil.rmtree(self.watch.path, ignore_errors=True)
+
+
+class DownloadWatcher:
+    """
+    one long-lived observer for all downloads of a browser. Every
+    download gets its own DownloadFileHandler watching the directory
+    the browser was told to save it to.
+    """
+
+    def __init__(self):
+        self.observer = None
+        self.lock = threading.Lock()
+
+    def expect(self, directory, staging=False):
+        """
+        start watching directory for the next downloaded file
+
+        :param directory: directory the browser downloads to
+        :param staging: directory is only used by this download
+        :result: DownloadFileHandler to wait() for the file and close()
+        """
+        with self.lock:
+            # start observer thread on first download
+            if not self.observer:
+                self.observer = watchdog.observers.Observer()
+                self.observer.start()
+        return DownloadFileHandler(self.observer, directory, staging)
+
+    def stop(self):
+        """stop observer thread"""
+        with self.lock:
+            if self.observer:
+                self.observer.stop()
+                self.observer.join()
+                self.observer = None
@@ -0,0 +1,90 @@
+"""remember HTTP validators of downloaded urls for conditional requests"""
+
+import json
+import os
+import threading
+
+
+class ValidatorCache:
+    """
+    json file next to the downloaded files that stores ETag,
+    Last-Modified and Content-Length of every downloaded url
+    """
+
+    FILENAME = ".document-dl-cache.json"
+
+    def __init__(self, directory):
+        """
+        :param directory: directory that downloaded files are saved to
+        """
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILENAME)
+        # cache is shared by all download threads
+        self.lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def _entry(self, url):
+        """:result: cache entry of url if its file is still intact or None"""
+        with self.lock:
+            entry = self.entries.get(url)
+        if not entry:
+            return None
+        path = os.path.join(self.directory, entry["filename"])
+        # file must not have been removed or changed
+        if not os.path.isfile(path) or os.path.getsize(path) != entry["size"]:
+            return None
+        return entry
+
+    def headers(self, url):
+        """:result: dict of headers for a conditional GET of url"""
+        if not (entry := self._entry(url)):
+            return {}
+        headers = {}
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def filename(self, url):
+        """:result: path of file url was saved to or None"""
+        if not (entry := self._entry(url)):
+            return None
+        return os.path.join(self.directory, entry["filename"])
+
+    def digest(self, url):
+        """:result: sha256 hexdigest of file url was saved to or None"""
+        if not (entry := self._entry(url)):
+            return None
+        return entry.get("sha256")
+
+    def update(self, url, headers, path, digest=None):
+        """
+        remember validators of downloaded url
+
+        :param url: downloaded url
+        :param headers: response headers
+        :param path: path of file url was saved to
+        :param digest: sha256 hexdigest of file
+        """
+        # nothing to validate against next time
+        if "etag" not in headers and "last-modified" not in headers:
+            return
+        with self.lock:
+            self.entries[url] = {
+                "etag": headers.get("etag"),
+                "last_modified": headers.get("last-modified"),
+                "content_length": headers.get("content-length"),
+                # relative to directory
+                "filename": os.path.relpath(path, self.directory),
+                "size": os.path.getsize(path),
+                "sha256": digest,
+            }
+            # save atomically so an interrupted run can't corrupt the cache
+            with open(f"{self.path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(f"{self.path}.tmp", self.path)
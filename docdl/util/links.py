@@ -0,0 +1,80 @@
+"""download links without clicking them in the browser"""
+
+import threading
+import time
+import urllib.parse
+from selenium.common.exceptions import WebDriverException
+
+
+def resolve(element, current_url):
+    """
+    :param element: selenium WebElement that's clicked to download
+    :param current_url: url of the page the element is on
+    :result: url the element links to or None if it's not a plain link
+    """
+    try:
+        if element.tag_name.lower() != "a":
+            return None
+        # absolute url
+        href = element.get_attribute("href")
+    except WebDriverException:
+        return None
+    if not href or urllib.parse.urlsplit(href).scheme not in ("http", "https"):
+        return None
+    # links to the page itself are handled by javascript
+    if urllib.parse.urldefrag(href)[0] == urllib.parse.urldefrag(current_url)[0]:
+        return None
+    return href
+
+
+class LinkDownload:
+    """
+    download of a resolved link using the requests session of a portal
+    (same interface as the browser download handlers)
+    """
+
+    # already reported by the requests download
+    seconds = None
+    filename = None
+
+    def __init__(self, portal, document, url):
+        """
+        :param portal: docdl.WebPortal to download with
+        :param document: docdl.Document with download_element
+        :param url: url the download_element links to
+        """
+        self.portal = portal
+        self.document = document
+        self.url = url
+        self.path = None
+        # nothing to wait for
+        self.started = threading.Event()
+        self.started.set()
+        self.begin = time.monotonic()
+
+    def download(self):
+        """
+        GET url (raises docdl.DownloadError if it doesn't lead to a file)
+
+        :result: path of downloaded file
+        """
+        # don't touch the document's url, it identifies the document
+        link = type(self.document)(
+            url=self.url,
+            attributes=self.document.attributes,
+            request_headers=self.document.request_headers,
+            download_element=self.document.download_element,
+        )
+        self.path = self.portal.download_with_requests(link)
+        self.document.digest = link.digest
+        return self.path
+
+    def wait(self, timeout, deadline=None):
+        """:result: path of downloaded file"""
+        # pylint: disable=W0613
+        if self.path is None:
+            self.download()
+        return self.path
+
+    def close(self):
+        """nothing to clean up"""
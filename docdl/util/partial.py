@@ -0,0 +1,105 @@
+"""
+partial downloads: bodies are saved to <path>.part next to a
+<path>.part.validator with the ETag/Last-Modified of their version, so
+truncated downloads can be resumed with a Range request later
+"""
+
+import hashlib
+import os
+
+from docdl.errors import DownloadError, IncompleteDownloadError
+
+
+def resume_headers(path):
+    """
+    :param path: path of file that's about to be downloaded
+    :result: dict with Range/If-Range headers to resume a partial
+             download or empty dict
+    """
+    partname = f"{path}.part"
+    try:
+        with open(f"{partname}.validator", "r", encoding="utf-8") as f:
+            validator = f.read().strip()
+        size = os.path.getsize(partname)
+    except FileNotFoundError:
+        return {}
+    # only resume with a validator, so we never mix different versions
+    if not validator or size == 0:
+        return {}
+    return {"Range": f"bytes={size}-", "If-Range": validator}
+
+
+def remove(path):
+    """remove partial download and its validator"""
+    for leftover in (f"{path}.part", f"{path}.part.validator"):
+        if os.path.exists(leftover):
+            os.remove(leftover)
+
+
+def begin(url, status, headers, path):
+    """
+    prepare path.part for the body of a response
+
+    :param url: url of response
+    :param status: HTTP status code of response
+    :param headers: response headers
+    :param path: path of file to save to
+    :result: tuple of file mode for path.part and sha256 hash object
+    """
+    partname = f"{path}.part"
+    digest = hashlib.sha256()
+    # server sent the remaining bytes of our partial download?
+    if status == 206:
+        offset = os.path.getsize(partname) if os.path.exists(partname) else 0
+        # make sure the server continues where we stopped
+        if not headers.get("content-range", "").startswith(f"bytes {offset}-"):
+            raise DownloadError(
+                f'"{url}" unexpected content-range: '
+                f'{headers.get("content-range")}'
+            )
+        mode = "ab"
+        # hash what we already got
+        with open(partname, "rb") as doc:
+            while chunk := doc.read(1024 * 1024):
+                digest.update(chunk)
+    else:
+        mode = "wb"
+
+    # remember strong validator of this version to safely resume later
+    # (byte ranges of compressed content can't be resumed)
+    validator = headers.get("etag", "")
+    if not validator or validator.startswith("W/"):
+        validator = headers.get("last-modified", "")
+    if headers.get("content-encoding", "identity") != "identity":
+        validator = ""
+    with open(f"{partname}.validator", "w", encoding="utf-8") as f:
+        f.write(validator)
+    return mode, digest
+
+
+def end(url, headers, path, received):
+    """
+    move completely downloaded path.part to path
+
+    :param url: url of response
+    :param headers: response headers
+    :param path: path of file to save to
+    :param received: amount of body bytes received as sent by
+                     the server (None to skip the check)
+    """
+    partname = f"{path}.part"
+    # received less (or more) bytes than announced?
+    if (
+        received is not None
+        and "content-length" in headers
+        and received != int(headers["content-length"])
+    ):
+        raise IncompleteDownloadError(
+            f'"{url}" incomplete: received {received} of '
+            f'{headers["content-length"]} bytes',
+            path,
+        )
+
+    # download complete
+    os.replace(partname, path)
+    os.remove(f"{partname}.validator")
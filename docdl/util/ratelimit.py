@@ -0,0 +1,118 @@
+"""per host rate limiting shared by all sessions and threads"""
+
+import asyncio
+import threading
+import time
+import urllib.parse
+import requests.adapters
+import urllib3.util
+
+
+class TokenBucket:
+    """token bucket allowing rate requests per second with bursts"""
+
+    def __init__(self, rate, burst=1):
+        """
+        :param rate: tokens added per second
+        :param burst: maximum amount of tokens saved up
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """
+        take a token
+
+        :result: seconds to wait until the token may be used
+        """
+        with self.lock:
+            now = time.monotonic()
+            # refill
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            # tokens may become negative, so waiting callers queue up
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        """block until a token is available"""
+        time.sleep(self.reserve())
+
+    async def acquire_async(self):
+        """wait for a token without blocking the event loop"""
+        await asyncio.sleep(self.reserve())
+
+
+# buckets of all hosts in this process
+_BUCKETS = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def bucket(url, rate, burst=1):
+    """
+    :param url: url of request
+    :param rate: requests per second for host (if bucket is new)
+    :param burst: burst size for host (if bucket is new)
+    :result: process wide TokenBucket of the url's host
+    """
+    host = urllib.parse.urlsplit(url).hostname
+    with _BUCKETS_LOCK:
+        if host not in _BUCKETS:
+            _BUCKETS[host] = TokenBucket(rate, burst)
+        return _BUCKETS[host]
+
+
+class RateLimitedRetry(urllib3.util.Retry):
+    """urllib3 Retry that waits for the token bucket of the host before retrying"""
+
+    def __init__(self, *args, rate=None, burst=1, **kwargs):
+        """
+        :param rate: requests per second per host (None for unlimited)
+        :param burst: amount of requests that may be sent at once
+        """
+        self.rate = rate
+        self.burst = burst
+        # scheme and host of the request being retried
+        self.origin = None
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kw):
+        return super().new(rate=self.rate, burst=self.burst, **kw)
+
+    def increment(self, *args, **kwargs):
+        retry = super().increment(*args, **kwargs)
+        if pool := kwargs.get("_pool"):
+            retry.origin = f"{pool.scheme}://{pool.host}"
+        return retry
+
+    def sleep(self, response=None):
+        super().sleep(response)
+        # retries are requests, too
+        if self.rate and self.origin:
+            bucket(self.origin, self.rate, self.burst).acquire()
+
+
+class RateLimitedAdapter(requests.adapters.HTTPAdapter):
+    """HTTPAdapter that waits for the token bucket of each request's host"""
+
+    def __init__(self, rate=None, burst=1, **kwargs):
+        """
+        :param rate: requests per second per host (None for unlimited)
+        :param burst: amount of requests that may be sent at once
+        """
+        self.rate = rate
+        self.burst = burst
+        super().__init__(**kwargs)
+
+    # pylint: disable=W0221
+    def send(self, request, *args, **kwargs):
+        if self.rate:
+            bucket(request.url, self.rate, self.burst).acquire()
+        return super().send(request, *args, **kwargs)
@@ -0,0 +1,112 @@
+"""load lazy-loading ("infinite scroll") lists inside the browser"""
+
+from docdl.util.table import XPATH_PREFIXES
+
+# seconds a single script may run (below the default script timeout)
+SLICE = 10
+
+# scroll down until no more items appear and call back with
+# {"count": items, "steps": scrolls, "done": true if nothing more loaded}
+SCRIPT = """
+const [items, loading, steps, idle, timeout, xpathPrefixes, done] = arguments;
+
+function select(selector, all) {
+    if (!xpathPrefixes.some((prefix) => selector.startsWith(prefix))) {
+        return all
+            ? document.querySelectorAll(selector).length
+            : document.querySelector(selector);
+    }
+    const result = document.evaluate(
+        selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+    );
+    return all ? result.snapshotLength : result.snapshotItem(0);
+}
+
+function busy() {
+    const element = loading && select(loading, false);
+    return element && element.isConnected
+        && (element.offsetWidth > 0 || element.offsetHeight > 0
+            || element.getClientRects().length > 0)
+        && getComputedStyle(element).visibility !== "hidden";
+}
+
+let count = select(items, true);
+const initial = count;
+let scrolled = 0;
+let lastChange = Date.now();
+function scroll() {
+    window.scrollTo(0, document.documentElement.scrollHeight);
+    scrolled++;
+    lastChange = Date.now();
+}
+
+let finished = false;
+function finish(more) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    observer.disconnect();
+    clearInterval(interval);
+    clearTimeout(timer);
+    done({count: count, steps: scrolled, done: !more});
+}
+
+function poll() {
+    const current = select(items, true);
+    if (current > count) {
+        count = current;
+        if (steps !== null && scrolled >= steps) {
+            finish(true);
+        } else {
+            scroll();
+        }
+    } else if (busy()) {
+        lastChange = Date.now();
+    } else if (Date.now() - lastChange > idle) {
+        finish(false);
+    }
+}
+
+const observer = new MutationObserver(poll);
+observer.observe(document, {subtree: true, childList: true});
+// loaders may vanish without mutating the DOM
+const interval = setInterval(poll, 100);
+// try again if the list is still growing
+const timer = setTimeout(() => finish(count > initial), timeout);
+scroll();
+"""
+
+
+def load_all(webdriver, items, loading=None, steps=None, idle=2):
+    """
+    scroll down until a lazy-loading list doesn't grow anymore. The page
+    scrolls on its own whenever items were added, so there's no
+    webdriver round-trip per step.
+
+    :param webdriver: selenium webdriver
+    :param items: css selector or xpath of the list items
+    :param loading: css selector or xpath of the indicator shown while
+                    loading (optional)
+    :param steps: scroll down at most that many times (default: until
+                  the list is complete)
+    :param idle: seconds to wait for new items after the indicator
+                 disappeared
+    :result: number of items
+    """
+    while True:
+        result = webdriver.execute_async_script(
+            SCRIPT,
+            items,
+            loading,
+            steps,
+            idle * 1000,
+            SLICE * 1000,
+            list(XPATH_PREFIXES),
+        )
+        if result["done"]:
+            return result["count"]
+        if steps is not None:
+            steps -= result["steps"]
+            if steps <= 0:
+                return result["count"]
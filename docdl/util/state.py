@@ -0,0 +1,111 @@
+"""remember downloaded documents across runs"""
+
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+from .dateparser import DateEncoder
+
+
+class State:
+    """
+    sqlite database of documents that have already been downloaded
+    per plugin and account
+    """
+
+    def __init__(self, filename, plugin, account):
+        """
+        :param filename: path of sqlite database (created if missing)
+        :param plugin: name of plugin
+        :param account: login id
+        """
+        self.plugin = plugin
+        self.account = account
+        # create parent directory
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        # connection is shared by all threads
+        self.lock = threading.Lock()
+        self.database = sqlite3.connect(filename, check_same_thread=False)
+        with self.lock, self.database:
+            self.database.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                "plugin TEXT NOT NULL, "
+                "account TEXT NOT NULL, "
+                "key TEXT NOT NULL, "
+                "path TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "attributes TEXT NOT NULL, "
+                "downloaded TEXT NOT NULL, "
+                "PRIMARY KEY (plugin, account, key))"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """close database"""
+        with self.lock:
+            self.database.close()
+
+    def downloaded(self, document):
+        """
+        :param document: docdl.Document
+        :result: True if document was downloaded before and its file
+                 is still there, False otherwise
+        """
+        with self.lock:
+            row = self.database.execute(
+                "SELECT path, size FROM documents "
+                "WHERE plugin=? AND account=? AND key=?",
+                (self.plugin, self.account, document.key()),
+            ).fetchone()
+        if row is None:
+            return False
+        path, size = row
+        # file must not have been removed or changed
+        return os.path.isfile(path) and os.path.getsize(path) == size
+
+    def known(self, attribute, value):
+        """
+        :param attribute: name of document attribute
+        :param value: value of attribute
+        :result: True if a document with this attribute value was
+                 downloaded before (even if its file is gone)
+        """
+        with self.lock:
+            row = self.database.execute(
+                "SELECT 1 FROM documents "
+                "WHERE plugin=? AND account=? AND json_extract(attributes, ?)=? "
+                "LIMIT 1",
+                (self.plugin, self.account, f"$.{attribute}", value),
+            ).fetchone()
+        return row is not None
+
+    def add(self, document, path):
+        """
+        remember downloaded document
+
+        :param document: docdl.Document that was downloaded
+        :param path: path of the downloaded file
+        """
+        path = os.path.abspath(path)
+        with self.lock, self.database:
+            self.database.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(plugin, account, key, path, size, attributes, downloaded) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.plugin,
+                    self.account,
+                    document.key(),
+                    path,
+                    os.path.getsize(path),
+                    json.dumps(document.attributes, sort_keys=True, cls=DateEncoder),
+                    datetime.datetime.now().isoformat(),
+                ),
+            )
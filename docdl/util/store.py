@@ -0,0 +1,91 @@
+"""content addressed store to deduplicate downloaded files"""
+
+import contextlib
+import errno
+import hashlib
+import os
+import shutil
+import tempfile
+
+
+class ContentStore:
+    """
+    directory of blobs named by the sha256 digest of their content.
+    Downloaded files are replaced by hardlinks to their blob, so
+    identical documents only use disk space once.
+    (Files on another filesystem than the store are copied to it but
+    can't be deduplicated)
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: directory to keep blobs in
+        """
+        self.directory = directory
+
+    @staticmethod
+    def digest(path):
+        """:result: sha256 hexdigest of file"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def blob(self, digest):
+        """:result: path of blob with digest"""
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def add(self, path, digest=None):
+        """
+        replace file with hardlink to the blob of its content
+
+        :param path: path of file to deduplicate
+        :param digest: sha256 hexdigest of file (calculated if None)
+        :result: path of blob
+        """
+        if digest is None:
+            digest = self.digest(path)
+        blob = self.blob(digest)
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            # first file with this content becomes the blob
+            os.link(path, blob)
+        except FileExistsError:
+            # already deduplicated?
+            if os.path.samefile(path, blob):
+                return blob
+            try:
+                self._replace_with_link(path, blob)
+            # store is on another filesystem, keep file
+            except OSError as exc:
+                if exc.errno != errno.EXDEV:
+                    raise
+        except OSError as exc:
+            if exc.errno != errno.EXDEV:
+                raise
+            # store is on another filesystem, keep a copy as blob
+            self._copy_to_blob(path, blob)
+        return blob
+
+    @staticmethod
+    def _replace_with_link(path, blob):
+        """atomically replace file with a hardlink to blob"""
+        link = f"{path}.link"
+        # left over by an interrupted run
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(link)
+        os.link(blob, link)
+        os.replace(link, path)
+
+    @staticmethod
+    def _copy_to_blob(path, blob):
+        """atomically create blob as copy of file"""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob))
+        os.close(fd)
+        try:
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, blob)
+        except OSError:
+            os.remove(tmp)
+            raise
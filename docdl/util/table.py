@@ -0,0 +1,73 @@
+"""extract tables from web pages with a single webdriver round-trip"""
+
+# selectors starting with these are xpath expressions, css otherwise
+XPATH_PREFIXES = ("/", "./", "(")
+
+# read columns of all rows in the browser
+SCRIPT = """
+const [rows, columns, root, xpathPrefixes] = arguments;
+
+function select(context, selector, all) {
+    if (!xpathPrefixes.some((prefix) => selector.startsWith(prefix))) {
+        return all
+            ? Array.from(context.querySelectorAll(selector))
+            : context.querySelector(selector);
+    }
+    if (!all) {
+        return document.evaluate(
+            selector, context, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+    }
+    const result = document.evaluate(
+        selector, context, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+    );
+    return Array.from({length: result.snapshotLength}, (_, i) => result.snapshotItem(i));
+}
+
+function read(element, property) {
+    if (!element) {
+        return null;
+    }
+    if (property === "element") {
+        return element;
+    }
+    if (property === "textContent" || property === "innerText") {
+        return (element[property] || "").trim();
+    }
+    if (property in element) {
+        return element[property];
+    }
+    return element.getAttribute(property);
+}
+
+return select(root || document, rows, true).map((row) => {
+    const result = {};
+    for (const [name, [selector, property]] of Object.entries(columns)) {
+        result[name] = read(selector ? select(row, selector, false) : row, property);
+    }
+    return result;
+});
+"""
+
+
+def extract(webdriver, rows, columns, root=None):
+    """
+    read a table in one execute_script() call instead of one webdriver
+    request per cell
+
+    :param webdriver: selenium webdriver
+    :param rows: css selector or xpath of rows
+    :param columns: dict of column name to css selector or xpath of the
+                    cell inside the row (textContent) or tuple of selector
+                    and property/attribute of the cell to read. An empty
+                    selector reads the row itself, the "element" property
+                    returns the selenium WebElement (e.g. to click it)
+    :param root: WebElement to search rows in (default: whole page)
+    :result: list of dicts with the columns of each row (None for cells
+             that don't exist)
+    """
+    spec = {
+        name: [column, "textContent"] if isinstance(column, str) else list(column)
+        for name, column in columns.items()
+    }
+    return webdriver.execute_script(SCRIPT, rows, spec, root, list(XPATH_PREFIXES))
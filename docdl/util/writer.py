@@ -0,0 +1,63 @@
+"""copy download streams to files without per-chunk allocations"""
+
+import threading
+import time
+
+
+class StreamWriter:
+    """
+    copy a readable stream to a file through a preallocated buffer
+    that's reused by all downloads of a thread. Streams that read
+    straight into the buffer (like http.client.HTTPResponse) aren't
+    copied in memory at all.
+    """
+
+    # one buffer per thread
+    _local = threading.local()
+
+    def __init__(self, buffer_size=4 * 1024 * 1024):
+        """
+        :param buffer_size: maximum amount of bytes read at once
+        """
+        self.buffer_size = max(buffer_size, 1)
+        # statistics
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def _buffer(self):
+        """:result: memoryview of this thread's buffer"""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None or len(buffer) < self.buffer_size:
+            buffer = self._local.buffer = bytearray(self.buffer_size)
+        return memoryview(buffer)[: self.buffer_size]
+
+    def copy(self, source, target, digest=None):
+        """
+        copy source to target until source is exhausted
+
+        :param source: object with readinto() method
+        :param target: object with write() method
+        :param digest: hashlib object to update with every chunk
+        :result: number of bytes copied
+        """
+        view = self._buffer()
+        copied = 0
+        start = time.monotonic()
+        try:
+            while count := source.readinto(view):
+                chunk = view[:count]
+                target.write(chunk)
+                if digest:
+                    digest.update(chunk)
+                copied += count
+        finally:
+            self.bytes += copied
+            self.seconds += time.monotonic() - start
+        return copied
+
+    @property
+    def rate(self):
+        """:result: bytes per second of all copies"""
+        if not self.seconds:
+            return 0.0
+        return self.bytes / self.seconds
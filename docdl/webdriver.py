@@ -0,0 +1,251 @@
+"""start selenium webdrivers configured to download documents"""
+
+# all webdrivers take the same arguments pylint: disable=W0613
+
+import os
+import platform
+import shutil
+import urllib.parse
+from selenium import webdriver
+
+
+# firefox preferences that block resource types
+FIREFOX_BLOCK_PREFS = {
+    "image": {"permissions.default.image": 2},
+    "media": {"media.autoplay.default": 5},
+    "font": {"gfx.downloadable_fonts.enabled": False},
+    "script": {"javascript.enabled": False},
+}
+# chrome content settings that block resource types without intercepting
+# requests
+CHROME_CONTENT_SETTINGS = {
+    "image": "images",
+    "script": "javascript",
+}
+
+
+def _chrome_content_patterns(urls):
+    """
+    :param urls: url patterns (* wildcards)
+    :result: chrome content setting patterns of the hosts of urls or None
+             if a pattern doesn't match whole hosts
+    """
+    patterns = []
+    for url in urls:
+        host = urllib.parse.urlsplit(url).hostname
+        if host and host.startswith("*."):
+            host = f"[*.]{host[2:]}"
+        if not host or "*" in host.replace("[*.]", ""):
+            return None
+        patterns.append(f"{host},*")
+    return patterns
+
+
+def _chrome_block_prefs(portal):
+    """:result: chrome preferences that block portal.block_resources"""
+    # the request blocker takes care of all resource types
+    if portal.intercept_requests:
+        return {}
+    allowed = _chrome_content_patterns(portal.ALLOW_URLS)
+    # blocking would affect urls the plugin needs
+    if allowed is None:
+        return {}
+    prefs = {}
+    for resource in portal.block_resources:
+        if setting := CHROME_CONTENT_SETTINGS.get(resource):
+            prefs[f"profile.default_content_setting_values.{setting}"] = 2
+            prefs[f"profile.content_settings.exceptions.{setting}"] = {
+                pattern: {"setting": 1} for pattern in allowed
+            }
+    return prefs
+
+
+def create_options(browser):
+    """:result: selenium options of browser"""
+    # choose webdriver options
+    if browser == "chrome":
+        # pylint: disable=C0415
+        from selenium.webdriver.chrome.options import Options
+
+    elif browser == "edge":
+        # pylint: disable=C0415
+        from selenium.webdriver.edge.options import Options
+
+    elif browser == "firefox":
+        # pylint: disable=C0415
+        from selenium.webdriver.firefox.options import Options
+
+    elif browser == "ie":
+        # pylint: disable=C0415
+        from selenium.webdriver.ie.options import Options
+
+    elif browser == "safari":
+        # pylint: disable=C0415,E0611,E0401
+        from selenium.webdriver.safari.options import Options
+
+    elif browser == "webkitgtk":
+        # pylint: disable=C0415
+        from selenium.webdriver.webkitgtk.options import Options
+
+    else:
+        raise AttributeError('unknown webdriver: "{browser}"')
+    return Options()
+
+
+def _chrome(portal, webdriver_options, options):
+    # attach to running browser (its options were set by the daemon)
+    if portal.browser_lease:
+        webdriver_options.debugger_address = portal.browser_lease.debugger_address
+        driver = webdriver.Chrome(options=webdriver_options)
+        # use the tab in the lease's private browser context
+        driver.switch_to.window(portal.browser_lease.target)
+        # browser and requests session must look the same to the portal
+        if portal.useragent:
+            driver.execute_cdp_cmd(
+                "Emulation.setUserAgentOverride", {"userAgent": portal.useragent}
+            )
+        return driver
+    # add prefs
+    # selenium webdriver specific options
+    if "headless" in options:
+        # set headless mode
+        webdriver_options.headless = options["headless"]
+    if "load_images" in options and options["load_images"]:
+        # disable image loading
+        webdriver_options.add_experimental_option(
+            "prefs",
+            {
+                "profile.default_content_settings.images": 2,
+                "profile.managed_default_content_settings.images": 2,
+            },
+        )
+    # keep profile between runs
+    if portal.profile_dir:
+        webdriver_options.add_argument(f"--user-data-dir={portal.profile_dir}")
+    # enable incognito mode
+    else:
+        webdriver_options.add_argument("--incognito")
+    # set preferences
+    webdriver_options.add_experimental_option(
+        "prefs",
+        {
+            # always save PDFs
+            "plugins.always_open_pdf_externally": True,
+            # set default download directory
+            "download.default_directory": portal.download_dir,
+            # block resource types without intercepting requests
+            **_chrome_block_prefs(portal),
+        },
+    )
+    # set user agent
+    if portal.useragent:
+        webdriver_options.add_argument(f"user-agent='{portal.useragent}'")
+    # enable debugging
+    if "debug" in options:
+        webdriver_options.add_argument("--remote-debugging-port=9222")
+    # set preference options & init webdriver
+    return webdriver.Chrome(options=webdriver_options)
+
+
+def _edge(portal, webdriver_options, options):
+    # pylint: disable=E1123
+    return webdriver.Edge(options=webdriver_options)
+
+
+def _firefox(portal, webdriver_options, options):
+    # pylint: disable=C0415
+    from selenium.webdriver.firefox.firefox_binary import FirefoxBinary
+
+    # keep profile between runs (geckodriver sets the preferences)
+    if portal.profile_dir:
+        webdriver_options.add_argument("-profile")
+        webdriver_options.add_argument(portal.profile_dir)
+        set_preference = webdriver_options.set_preference
+    # create custom profile
+    else:
+        firefox_profile = webdriver.FirefoxProfile()
+        set_preference = firefox_profile.set_preference
+    # webdriver.get_cookies() won't work in private browsing mode :(
+    # ~ # always enable private browsing
+    # ~ set_preference("browser.privatebrowsing.autostart", True)
+    # set default download directory
+    set_preference("browser.download.folderList", 2)
+    set_preference("browser.download.manager.showWhenStarting", False)
+    set_preference("browser.download.dir", portal.download_dir)
+    # save PDFs by default (don't preview)
+    set_preference("browser.helperApps.neverAsk.saveToDisk", "application/pdf")
+    set_preference("pdfjs.disabled", True)
+    set_preference("plugin.scan.Acrobat", "999.0")
+    set_preference("plugin.scan.plid.all", False)
+    # turn off image loading by default
+    set_preference("permissions.default.image", 2)
+    # block resource types (firefox can't block urls or allow exceptions)
+    for resource in portal.block_resources:
+        for name, value in FIREFOX_BLOCK_PREFS.get(resource, {}).items():
+            set_preference(name, value)
+    # headless mode
+    if "headless" in options:
+        # set headless mode
+        webdriver_options.headless = options["headless"]
+    # set user agent
+    if portal.useragent:
+        set_preference("general.useragent.override", portal.useragent)
+    # find binary
+    if platform.machine() in ["x86_64", "s390x", "sparc64"]:
+        moz_lib_dir = "/usr/lib64"
+        secondary_lib_dir = "/usr/lib"
+    else:
+        moz_lib_dir = "/usr/lib"
+        secondary_lib_dir = "/usr/lib64"
+    # try firefox binary
+    ff_path = f"{moz_lib_dir}/firefox/firefox"
+    if not (os.path.isfile(ff_path) and os.access(ff_path, os.X_OK)):
+        ff_path = f"{secondary_lib_dir}/firefox/firefox"
+        if not (os.path.isfile(ff_path) and os.access(ff_path, os.X_OK)):
+            raise RuntimeError(
+                f"firefox binary not found in {moz_lib_dir} "
+                "or {secondary_lib_dir}"
+            )
+    # get path to geckodriver executable
+    gecko_path = shutil.which("geckodriver")
+    # set firefox profile
+    if not portal.profile_dir:
+        webdriver_options.profile = firefox_profile
+    # set firefox binary
+    webdriver_options.binary = FirefoxBinary(os.path.join(gecko_path, ff_path))
+    # initialize driver
+    return webdriver.Firefox(options=webdriver_options)
+
+
+def _ie(portal, webdriver_options, options):
+    return webdriver.Ie(options=webdriver_options)
+
+
+def _safari(portal, webdriver_options, options):
+    # pylint: disable=E1123
+    return webdriver.Safari(options=webdriver_options)
+
+
+def _webkitgtk(portal, webdriver_options, options):
+    return webdriver.WebKitGTK(options=webdriver_options)
+
+
+# webdriver registry
+WEBDRIVERS = {
+    "chrome": _chrome,
+    "edge": _edge,
+    "firefox": _firefox,
+    "ie": _ie,
+    "safari": _safari,
+    "webkitgtk": _webkitgtk,
+}
+
+
+def start(portal, webdriver_options, options):
+    """
+    :param portal: docdl.SeleniumWebPortal to start the webdriver for
+    :param webdriver_options: selenium options from create_options()
+    :param options: dict of webdriver specific options
+    :result: selenium webdriver
+    """
+    return WEBDRIVERS[portal.WEBDRIVER](portal, webdriver_options, options)
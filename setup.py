@@ -21,8 +21,13 @@ setup(
         'requests',
         'selenium >4.9.0, <4.12.0',
         'slugify',
-        'watchdog'
+        'trio',
+        'urllib3 >=1.26',
+        'watchdog >=2.1'
     ],
+    extras_require={
+        "async": ["aiohttp"],
+    },
     packages=find_packages(exclude=["tests*"]),
     entry_points={
         "docdl_plugins": [
@@ -39,6 +44,7 @@ setup(
         ],
         "console_scripts": [
             "document-dl=docdl.cli:documentdl",
+            "document-dl-browserd=docdl.browserd:browserd",
         ],
     },
 )
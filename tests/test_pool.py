@@ -0,0 +1,61 @@
+"""tests for docdl.pool"""
+
+import threading
+import unittest
+
+import docdl.pool
+
+
+class FakePortal:
+    """portal that downloads documents by waiting for an event"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.proceed = threading.Event()
+        self.downloaded = []
+
+    def download(self, document):
+        """download in the foreground"""
+        self.downloaded.append(document)
+
+    def _download(self, document):
+        self.started.set()
+        self.proceed.wait(5)
+        self.downloaded.append(document)
+
+    def download_in_background(self, executor, document):
+        """download in a worker"""
+        return executor.submit(self._download, document)
+
+
+class TestDownloadPool(unittest.TestCase):
+    """DownloadPool"""
+
+    def test_waits_for_downloads(self):
+        """leaving the pool finishes all downloads"""
+        portal = FakePortal()
+        portal.proceed.set()
+        with docdl.pool.DownloadPool(portal, jobs=2) as pool:
+            for document in range(4):
+                pool.submit(document)
+        self.assertEqual(sorted(portal.downloaded), [0, 1, 2, 3])
+        self.assertEqual(list(pool.finished()), [0, 1, 2, 3])
+
+    def test_cancels_downloads_on_error(self):
+        """pending downloads are cancelled if something went wrong"""
+        portal = FakePortal()
+        with self.assertRaises(KeyError):
+            with docdl.pool.DownloadPool(portal, jobs=1) as pool:
+                for document in range(3):
+                    pool.submit(document)
+                portal.started.wait(5)
+                raise KeyError()
+        portal.proceed.set()
+        futures = [future for _, future in pool.pending]
+        # the running download can't be cancelled
+        self.assertFalse(futures[0].cancelled())
+        self.assertTrue(all(future.cancelled() for future in futures[1:]))
+
+
+if __name__ == "__main__":
+    unittest.main()